@@ -53,6 +53,29 @@ def get_str_type(value: str):
     return value
 
 
+"""Parse an XML file, clearing and removing every element whose tag is in exclude_tags as soon as it has been read"""
+
+
+def parse_xml_excluding(filepath, exclude_tags):
+    stack = []
+    root = None
+
+    for event, elem in ET.iterparse(filepath, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag in exclude_tags and stack:
+            # Free the (potentially huge) text of the excluded subtree right away
+            elem.clear()
+            stack[-1].remove(elem)
+
+    return root
+
+
 class Element(AbstractClass):
     """Abstract XML element to base all other XML elements off of"""
     @property
@@ -75,9 +98,12 @@ class Element(AbstractClass):
     def to_xml(self):
         raise NotImplementedError
 
-    """Read XML from filepath"""
+    """Read XML from filepath. Elements with a tag in exclude_tags are dropped while parsing."""
     @classmethod
-    def from_xml_file(cls, filepath):
+    def from_xml_file(cls, filepath, exclude_tags=None):
+        if exclude_tags:
+            return cls.from_xml(parse_xml_excluding(filepath, exclude_tags))
+
         elementTree = ET.ElementTree()
         elementTree.parse(filepath)
         return cls.from_xml(elementTree.getroot())
@@ -13,8 +13,8 @@ class YDD:
     file_extension = ".ydd.xml"
 
     @staticmethod
-    def from_xml_file(filepath):
-        return DrawableDictionary.from_xml_file(filepath)
+    def from_xml_file(filepath, exclude_tags=None):
+        return DrawableDictionary.from_xml_file(filepath, exclude_tags)
 
     @staticmethod
     def write_xml(drawable_dict, filepath):
@@ -26,8 +26,8 @@ class YDR:
     file_extension = ".ydr.xml"
 
     @staticmethod
-    def from_xml_file(filepath):
-        return Drawable.from_xml_file(filepath)
+    def from_xml_file(filepath, exclude_tags=None):
+        return Drawable.from_xml_file(filepath, exclude_tags)
 
     @staticmethod
     def write_xml(drawable, filepath):
@@ -1,7 +1,7 @@
 from abc import ABC as AbstractClass
 from xml.etree import ElementTree as ET
 from .codewalker_xml import *
-from .drawable import Drawable, LightsProperty
+from .drawable import Drawable, LightsProperty, SkeletonProperty
 from .bound import BoundsComposite
 
 
@@ -10,8 +10,28 @@ class YFT:
     file_extension = ".yft.xml"
 
     @staticmethod
-    def from_xml_file(filepath):
-        return Fragment.from_xml_file(filepath)
+    def from_xml_file(filepath, exclude_tags=None):
+        return Fragment.from_xml_file(filepath, exclude_tags)
+
+    @staticmethod
+    def skeleton_from_xml_file(filepath):
+        """Read only the skeleton of the drawable of a fragment, parsing stops at the end of its Skeleton element.
+        Returns None if the fragment has no skeleton."""
+        path = []
+        with open(filepath, "rb") as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    path.append(elem.tag)
+                    continue
+
+                if path == ["Fragment", "Drawable", "Skeleton"]:
+                    return SkeletonProperty.from_xml(elem)
+                path.pop()
+                if len(path) < 3:
+                    # Free everything before the skeleton as soon as it is parsed
+                    elem.clear()
+
+        return None
 
     @staticmethod
     def write_xml(fragment, filepath):
@@ -112,6 +112,8 @@ class ShaderManager:
                   "emissivenight_geomnightonly.sps", "emissivestrong_alpha.sps", "emissivestrong.sps", "normal_spec_reflect_emissivenight_alpha.sps", "emissive_alpha.sps",
                   "emissive_alpha_tnt.sps", "emissive_additive_alpha.sps", "emissivenight_alpha.sps", "glass_emissive.sps", "glass_emissivenight.sps", "glass_emissivenight_alpha.sps",
                   "glass_emissive_alpha.sps", "decal_emissive_only.sps", "decal_emissivenight_only.sps"]
+    # Filenames of the shaders that have a tint palette sampler, filled in by load_shaders
+    palette_shaders = set()
 
     def tinted_shaders():
         return ShaderManager.cutouts + ShaderManager.alphas + ShaderManager.glasses + ShaderManager.decals + ShaderManager.veh_cutouts + ShaderManager.veh_glasses + ShaderManager.veh_decals + ShaderManager.shadow_proxies
@@ -125,6 +127,9 @@ class ShaderManager:
         for node in tree.getroot():
             shader = Shader.from_xml(node)
             ShaderManager.shaders[shader.name] = shader
+            if any(param.name in ("TintPaletteSampler", "TextureSamplerDiffPal") for param in shader.parameters):
+                ShaderManager.palette_shaders.update(
+                    filename.value for filename in shader.filenames)
 
     @staticmethod
     def print_shader_collection():
@@ -1,9 +1,12 @@
 import bpy
 import traceback
+import inspect
 import os
 import time
 from abc import abstractmethod
 from .tools.meshhelper import get_children_recursive
+from .tools.utils import run_steps
+from .tools.blenderhelper import get_datablocks_snapshot, remove_datablocks_since
 from .sollumz_properties import BOUND_TYPES, SollumType
 from .ydr.ydrexport import get_used_materials
 
@@ -55,6 +58,197 @@ class SOLLUMZ_OT_base:
         self.report({"ERROR"}, msg)
 
 
+class SOLLUMZ_OT_modal_base(SOLLUMZ_OT_base):
+    """Operator that processes a list of jobs in chunks on a timer, reporting progress and allowing Esc cancellation.
+    A job is a callable returning True on success. It may instead be a generator function that yields a label for each
+    processed item (geometry, animation...) and returns its result, in which case the UI is updated between items.
+    While the jobs run only viewport navigation reaches blender, so the objects the jobs hold can't be edited, renamed
+    or deleted between steps."""
+    bl_action_progress = "Processing"
+    bl_timer_interval = 0.001
+    # Events passed through to blender while the jobs run, everything else is blocked
+    bl_pass_through_events = {"MOUSEMOVE", "INBETWEEN_MOUSEMOVE", "MIDDLEMOUSE", "WHEELUPMOUSE", "WHEELDOWNMOUSE",
+                              "TRACKPADPAN", "TRACKPADZOOM", "MOUSEROTATE", "WINDOW_DEACTIVATE", "TIMER_REPORT"}
+
+    @abstractmethod
+    def get_jobs(self, context):
+        """Get a list of (label, callable) jobs to run. Return None to cancel the operator."""
+        pass
+
+    def finish(self, context):
+        """Called after every job has run"""
+        return True
+
+    def get_kept_datablocks(self):
+        """Get the pointers of the datablocks created by jobs that are still used after the job, and must not be
+        removed when rolling back a failed job"""
+        return set()
+
+    def run(self, context):
+        jobs = self.get_jobs(context)
+        if jobs is None:
+            return False
+
+        for label, job in jobs:
+            snapshot = get_datablocks_snapshot()
+            result = run_job(job)
+            if not result:
+                remove_datablocks_since(snapshot, self.get_kept_datablocks())
+                self.bl_showtime = False
+
+        return self.finish(context)
+
+    def execute(self, context):
+        # Scripts calling the operator without invoking it expect it to finish before returning
+        if context.window is None or not getattr(self.options, "is_invoke", True):
+            return super().execute(context)
+
+        self.start_time = time.time()
+        self.start_snapshot = get_datablocks_snapshot()
+        try:
+            self.jobs = self.get_jobs(context)
+        except:
+            self.jobs = None
+            self.error(
+                f"Error occured running operator : {self.bl_idname} \n {traceback.format_exc()}")
+
+        if self.jobs is None:
+            return {"CANCELLED"}
+
+        self.job_index = 0
+        self.job_steps = None
+        self.job_snapshot = None
+
+        wm = context.window_manager
+        wm.progress_begin(0, max(len(self.jobs), 1))
+        self.timer = wm.event_timer_add(
+            self.bl_timer_interval, window=context.window)
+        wm.modal_handler_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC":
+            return self.cancel_jobs(context)
+
+        if event.type != "TIMER":
+            if event.type in self.bl_pass_through_events:
+                return {"PASS_THROUGH"}
+            # Block every event that could change the data the jobs are working on
+            return {"RUNNING_MODAL"}
+
+        if self.job_index < len(self.jobs):
+            self.step_job(context)
+            return {"RUNNING_MODAL"}
+
+        return self.finish_jobs(context)
+
+    def step_job(self, context):
+        label, job = self.jobs[self.job_index]
+        item = None
+        try:
+            if self.job_steps is None:
+                self.job_snapshot = get_datablocks_snapshot()
+                result = job()
+                if not inspect.isgenerator(result):
+                    self.end_job(result)
+                    return
+                self.job_steps = result
+            item = next(self.job_steps)
+        except StopIteration as e:
+            self.end_job(e.value)
+            return
+        except:
+            self.error(
+                f"Error occured running operator : {self.bl_idname} \n {traceback.format_exc()}")
+            self.end_job(False)
+            return
+
+        self.update_status(context, label, item)
+
+    def end_job(self, result):
+        if not result:
+            remove_datablocks_since(
+                self.job_snapshot, self.get_kept_datablocks())
+            self.bl_showtime = False
+
+        self.job_steps = None
+        self.job_index += 1
+
+    def update_status(self, context, label, item=None):
+        text = f"{self.bl_action_progress} {label}"
+        if item:
+            text += f" - {item}"
+        text += f" ({self.job_index + 1}/{len(self.jobs)}), press Esc to cancel"
+        context.workspace.status_text_set(text)
+        context.window_manager.progress_update(self.job_index)
+
+    def cleanup(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def finish_jobs(self, context):
+        self.cleanup(context)
+        try:
+            result = self.finish(context)
+            if self.bl_update_view:
+                reset_sollumz_view(context.scene)
+        except:
+            result = False
+            self.error(
+                f"Error occured running operator : {self.bl_idname} \n {traceback.format_exc()}")
+
+        if self.bl_showtime and result == True:
+            self.message(
+                f"{self.bl_label} took {round(time.time() - self.start_time, 3)} seconds to {self.bl_action}.")
+
+        if len(self.messages) > 0:
+            self.message('\n'.join(self.messages))
+
+        return {"FINISHED"} if result else {"CANCELLED"}
+
+    def release(self, context):
+        """Called when the jobs stop before finishing, to free what get_jobs set up"""
+        pass
+
+    def abort_jobs(self, context):
+        if self.job_steps is not None:
+            self.job_steps.close()
+            self.job_steps = None
+
+        self.cleanup(context)
+        self.release(context)
+        remove_datablocks_since(self.start_snapshot)
+        self.jobs = None
+
+    def cancel_jobs(self, context):
+        job_count = len(self.jobs)
+        self.abort_jobs(context)
+
+        if len(self.messages) > 0:
+            self.message('\n'.join(self.messages))
+        self.warning(
+            f"{self.bl_label} cancelled after {self.job_index} of {job_count} item(s), changes have been rolled back.")
+
+        return {"CANCELLED"}
+
+    def cancel(self, context):
+        # Called by blender when it removes the modal handler itself, e.g. when the window is closed or another file
+        # is loaded. Also called when the file browser is cancelled, before any job was set up
+        if getattr(self, "jobs", None) is not None:
+            self.abort_jobs(context)
+
+
+def run_job(job):
+    """Run a job to completion, stepping through it if it is a generator"""
+    result = job()
+    if inspect.isgenerator(result):
+        return run_steps(result)
+    return result
+
+
 def reset_sollumz_view(scene):
     scene.hide_collision = not scene.hide_collision
     scene.hide_high_lods = not scene.hide_high_lods
@@ -87,15 +281,32 @@ def get_sollumz_objects_from_objects(objs, sollum_type):
     return robjs
 
 
+# Fragment file found in each directory, keyed by (directory, modification time)
+fragment_files = {}
+
+
 def find_fragment_file(filepath):
     directory = os.path.dirname(filepath)
-    for file in os.listdir(directory):
-        if file.endswith(".yft.xml"):
-            return os.path.join(directory, file)
-    return None
+    try:
+        key = (directory, os.stat(directory).st_mtime_ns)
+    except OSError:
+        return None
+
+    if key not in fragment_files:
+        fragment_files[key] = None
+        for file in os.listdir(directory):
+            if file.endswith(".yft.xml"):
+                fragment_files[key] = os.path.join(directory, file)
+                break
+
+    return fragment_files[key]
+
 
+def has_embedded_textures(obj, export_context=None):
+    # Objects that were just exported already had their node trees scanned
+    if export_context and obj.name in export_context.embedded_textures:
+        return export_context.embedded_textures[obj.name]
 
-def has_embedded_textures(obj):
     for mat in get_used_materials(obj):
         nodes = mat.node_tree.nodes
         for node in nodes:
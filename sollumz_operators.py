@@ -14,27 +14,32 @@ from .resources.clipsdictionary import YCD
 from .resources.ytyp import YTYP
 from .resources.ymap import YMAP, EntityItem, CMapData
 from .ydr.ydrimport import import_ydr
-from .ydr.ydrexport import export_ydr
-from .ydd.yddimport import import_ydd
-from .ydd.yddexport import export_ydd
+from .ydr.ydrexport import ExportContext, export_ydr_steps
+from .ydd.yddimport import import_ydd_steps
+from .ydd.yddexport import export_ydd_steps
 from .yft.yftimport import import_yft
-from .yft.yftexport import export_yft
+from .yft.yftexport import export_yft_steps
 from .ybn.ybnimport import import_ybn
 from .ybn.ybnexport import export_ybn
 from .ynv.ynvimport import import_ynv
-from .ycd.ycdimport import import_ycd
-from .ycd.ycdexport import export_ycd
+from .ycd.ycdimport import import_ycd_steps
+from .ycd.ycdexport import export_ycd_steps
 from .tools.meshhelper import *
 from .tools.utils import *
 from .tools.blenderhelper import get_terrain_texture_brush
 from .tools.ytyphelper import ytyp_from_objects
+from .tools.reporthelper import REPORT_FILENAME, drawable_cost_report, get_report_summary, write_cost_report
+from .tools.texturehelper import TextureCopier
+from .tools.xmlhelper import XmlWriter
+from .tools.cachehelper import ExportManifest, get_export_hash
 
 
-class SOLLUMZ_OT_import(SOLLUMZ_OT_base, bpy.types.Operator, ImportHelper):
+class SOLLUMZ_OT_import(SOLLUMZ_OT_modal_base, bpy.types.Operator, ImportHelper):
     """Imports xml files exported by codewalker"""
     bl_idname = "sollumz.import"
     bl_label = "Import Codewalker XML"
     bl_action = "import"
+    bl_action_progress = "Importing"
     bl_showtime = True
     bl_update_view = True
 
@@ -60,7 +65,7 @@ class SOLLUMZ_OT_import(SOLLUMZ_OT_base, bpy.types.Operator, ImportHelper):
                 import_ydr(filepath, self.import_settings)
                 valid_type = True
             elif ext == YDD.file_extension:
-                import_ydd(self, filepath, self.import_settings)
+                yield from import_ydd_steps(self, filepath, self.import_settings)
                 valid_type = True
             elif ext == YFT.file_extension:
                 import_yft(filepath, self.import_settings)
@@ -71,41 +76,39 @@ class SOLLUMZ_OT_import(SOLLUMZ_OT_base, bpy.types.Operator, ImportHelper):
             elif ext == YNV.file_extension:
                 import_ynv(filepath)
             elif ext == YCD.file_extension:
-                import_ycd(self, filepath, self.import_settings)
+                yield from import_ycd_steps(self, filepath, self.import_settings)
 
             if valid_type:
                 self.message(f"Succesfully imported: {filepath}")
-        except:
+        except Exception:
             self.error(
                 f"Error importing: {filepath} \n {traceback.format_exc()}")
             return False
 
         return True
 
-    def run(self, context):
-        result = False
+    def get_jobs(self, context):
+        filepaths = []
         if self.import_settings.batch_mode == "DIRECTORY":
             folderpath = os.path.dirname(self.filepath)
             for file in os.listdir(folderpath):
                 ext = ''.join(pathlib.Path(file).suffixes)
                 if ext in self.filename_exts:
-                    filepath = os.path.join(folderpath, file)
-                    result = self.import_file(filepath, ext)
+                    filepaths.append((os.path.join(folderpath, file), ext))
         else:
             ext = ''.join(pathlib.Path(self.filepath).suffixes)
-            result = self.import_file(self.filepath, ext)
-
-        if not result:
-            self.bl_showtime = False
+            filepaths.append((self.filepath, ext))
 
-        return True
+        return [(os.path.basename(filepath), lambda filepath=filepath, ext=ext: self.import_file(filepath, ext))
+                for filepath, ext in filepaths]
 
 
-class SOLLUMZ_OT_export(SOLLUMZ_OT_base, bpy.types.Operator):
+class SOLLUMZ_OT_export(SOLLUMZ_OT_modal_base, bpy.types.Operator):
     """Exports codewalker xml files"""
     bl_idname = "sollumz.export"
     bl_label = "Export Codewalker XML"
     bl_action = "export"
+    bl_action_progress = "Exporting"
     bl_showtime = True
 
     export_settings: bpy.props.PointerProperty(type=SollumzExportSettings)
@@ -227,71 +230,189 @@ class SOLLUMZ_OT_export(SOLLUMZ_OT_base, bpy.types.Operator):
 
         return result
 
+    def get_export_filepath(self, obj):
+        if obj.sollum_type == SollumType.DRAWABLE:
+            return self.get_filepath(obj.name, YDR.file_extension)
+        elif obj.sollum_type == SollumType.DRAWABLE_DICTIONARY:
+            return self.get_filepath(obj.name, YDD.file_extension)
+        elif obj.sollum_type == SollumType.FRAGMENT:
+            name = obj.name if "/" not in obj.name else obj.name.replace(
+                "pack:/", "")
+            return self.get_filepath(name, YFT.file_extension)
+        elif obj.sollum_type == SollumType.CLIP_DICTIONARY:
+            return self.get_filepath(obj.name, YCD.file_extension)
+        elif obj.sollum_type in BOUND_TYPES:
+            return self.get_filepath(obj.name, YBN.file_extension)
+        return None
+
+    def get_output_files(self, obj, filepath, textures):
+        files = [filepath]
+        if obj.sollum_type == SollumType.FRAGMENT and self.export_settings.export_with_hi:
+            files.append(os.path.join(os.path.dirname(filepath),
+                                      os.path.basename(filepath).replace(".yft.xml", "_hi.yft.xml")))
+        # Textures copied to the texture folders, so deleting or editing one exports the object again
+        files.extend(path for path in textures if path not in files)
+        return files
+
+    def get_manifest(self, filepath):
+        directory = os.path.dirname(filepath)
+        if directory not in self.manifests:
+            self.manifests[directory] = ExportManifest(directory)
+        return self.manifests[directory]
+
     def export_object(self, obj):
+        filepath = None
         try:
-            valid_type = False
-            filepath = None
+            if obj.sollum_type == SollumType.FRAGMENT:
+                self.export_settings.use_transforms = False
+
+            filepath = self.get_export_filepath(obj)
+            if filepath is None:
+                return True
+
+            export_hash = None
+            exported_textures = self.export_context.exported_textures
+            first_texture = len(exported_textures)
+            if self.export_settings.skip_unchanged:
+                export_hash = get_export_hash(obj, self.export_settings)
+                if self.get_manifest(filepath).is_up_to_date(filepath, export_hash):
+                    self.message(f"Up to date: {filepath}")
+                    return True
+
             if obj.sollum_type == SollumType.DRAWABLE:
-                filepath = self.get_filepath(obj.name, YDR.file_extension)
-                export_ydr(self, obj, filepath, self.export_settings)
-                valid_type = True
+                yield from export_ydr_steps(self, obj, filepath, self.export_settings)
             elif obj.sollum_type == SollumType.DRAWABLE_DICTIONARY:
-                filepath = self.get_filepath(obj.name, YDD.file_extension)
-                export_ydd(self, obj, filepath, self.export_settings)
-                valid_type = True
+                yield from export_ydd_steps(self, obj, filepath, self.export_settings)
             elif obj.sollum_type == SollumType.FRAGMENT:
-                self.export_settings.use_transforms = False
-                name = obj.name if "/" not in obj.name else obj.name.replace(
-                    "pack:/", "")
-                filepath = self.get_filepath(name, YFT.file_extension)
-                export_yft(self, obj, filepath, self.export_settings)
-                valid_type = True
+                yield from export_yft_steps(self, obj, filepath, self.export_settings)
             elif obj.sollum_type == SollumType.CLIP_DICTIONARY:
-                filepath = self.get_filepath(obj.name, YCD.file_extension)
-                export_ycd(self, obj, filepath, self.export_settings)
-                valid_type = True
+                yield from export_ycd_steps(self, obj, filepath, self.export_settings)
             elif obj.sollum_type in BOUND_TYPES:
-                filepath = self.get_filepath(obj.name, YBN.file_extension)
                 export_ybn(obj, filepath, self.export_settings)
-                valid_type = True
-            if valid_type:
-                self.message(f"Succesfully exported: {filepath}")
-        except:
+
+            if export_hash is not None:
+                self.manifest_updates.append(
+                    (filepath, export_hash, self.get_output_files(obj, filepath, exported_textures[first_texture:])))
+            self.message(f"Succesfully exported: {filepath}")
+        except Exception:
             self.error(
                 f"Error exporting: {filepath} \n {traceback.format_exc()}")
             return False
         return True
 
-    def run(self, context):
-        objects = self.get_only_parent_objs(self.collect_objects(context))
+    def report_vertex_cache_stats(self):
+        for name, acmr_before, acmr_after in self.export_context.vertex_cache_stats:
+            self.messages.append(
+                f"{name}: ACMR {round(acmr_before, 3)} -> {round(acmr_after, 3)}")
+
+    def report_merged_materials(self):
+        for name, material, merged_into in self.export_context.merged_materials:
+            self.messages.append(
+                f"{name}: merged material {material} into {merged_into}")
+
+    def write_cost_report(self):
+        reported_drawables = self.export_context.reported_drawables
+        if not self.export_settings.export_report or len(reported_drawables) == 0:
+            return
+
+        cost_reports = [drawable_cost_report(drawable, exportpath, texture_sources)
+                        for drawable, exportpath, texture_sources in reported_drawables]
+        filepath = os.path.join(self.directory, REPORT_FILENAME)
+        try:
+            write_cost_report(
+                cost_reports, self.export_context.merged_materials, filepath)
+        except OSError:
+            self.error(f"Error writing report: {filepath} \n {traceback.format_exc()}")
+            return
+
+        for report in cost_reports:
+            self.messages.append(get_report_summary(report))
+        self.messages.append(f"Render cost report written to {filepath}")
+
+    def update_manifests(self, failed_files):
+        for filepath, export_hash, output_files in self.manifest_updates:
+            if any(path in failed_files for path in output_files):
+                continue
+            self.get_manifest(filepath).update(
+                filepath, export_hash, output_files)
+
+        for manifest in self.manifests.values():
+            manifest.save()
 
-        if len(objects) == 0:
+    def get_jobs(self, context):
+        self.export_context = None
+        self.texture_copier = None
+        self.manifests = {}
+        self.manifest_updates = []
+        self.objects = self.get_only_parent_objs(self.collect_objects(context))
+
+        if len(self.objects) == 0:
             self.warning(
                 f"No objects of type: {' or '.join([SOLLUMZ_UI_NAMES[t].lower() for t in self.export_settings.sollum_types])} to export.")
-            return False
+            return None
 
-        mode = "OBJECT"
+        self.mode = "OBJECT"
         if context.active_object:
-            mode = context.active_object.mode
-            if mode != 'OBJECT':
+            self.mode = context.active_object.mode
+            if self.mode != 'OBJECT':
                 bpy.ops.object.mode_set(mode='OBJECT')
 
-        if len(objects) > 0:
-            for obj in objects:
-                result = self.export_object(obj)
-                # Dont show time on failure
-                if not result:
-                    self.bl_showtime = False
+        self.export_context = ExportContext()
+        self.texture_copier = TextureCopier(
+            self.export_settings.link_textures)
+        XmlWriter.begin()
+        ExportCache.begin()
 
+        return [(obj.name, lambda obj=obj: self.export_object(obj)) for obj in self.objects]
+
+    def finish_texture_copies(self):
+        if self.texture_copier is None:
+            return
+
+        self.texture_copier.shutdown()
+        self.messages += self.texture_copier.errors
+        self.messages.append(self.texture_copier.get_summary())
+        self.texture_copier = None
+
+    def get_kept_datablocks(self):
+        # Mesh copies cached for the whole export, a failed object doesn't remove the ones other objects reuse
+        return ExportCache.get_datablocks()
+
+    def release(self, context):
+        XmlWriter.cancel()
+        self.export_context = None
+        # Remove the cached meshes before the rollback removes them
+        ExportCache.end()
+        self.finish_texture_copies()
+        self.restore_mode(context)
+
+    def restore_mode(self, context):
+        if context.active_object:
+            if context.active_object.mode != self.mode:
+                bpy.ops.object.mode_set(mode=self.mode)
+
+    def finish(self, context):
+        try:
             if self.export_settings.export_with_ytyp:
-                ytyp = ytyp_from_objects(objects)
+                ytyp = ytyp_from_objects(self.objects, self.export_context)
                 fp = self.get_filepath(
                     ytyp.name, YTYP.file_extension)
-                ytyp.write_xml(fp)
-
-        if context.active_object:
-            if context.active_object != mode:
-                bpy.ops.object.mode_set(mode=mode)
+                XmlWriter.write(ytyp, fp)
+        finally:
+            # The manifests record the copied textures, wait for them first
+            self.finish_texture_copies()
+            # Wait for the files still being written
+            failed = XmlWriter.finish()
+            for filepath, error in failed:
+                self.error(error)
+            self.update_manifests(set(filepath for filepath, error in failed))
+            self.report_vertex_cache_stats()
+            self.report_merged_materials()
+            self.write_cost_report()
+            self.export_context = None
+            ExportCache.end()
+
+        self.restore_mode(context)
 
         return True
 
@@ -503,6 +503,20 @@ class SollumzImportSettings(bpy.types.PropertyGroup):
         default=True,
     )
 
+    import_lods: bpy.props.EnumProperty(
+        name="LODs",
+        options={'ENUM_FLAG'},
+        items=((LODLevel.HIGH.value, "High", ""),
+               (LODLevel.MEDIUM.value, "Medium", ""),
+               (LODLevel.LOW.value, "Low", ""),
+               (LODLevel.VERYLOW.value, "Very Low", "")),
+        description="Which drawable LOD levels to import. Geometry, materials and textures only used by excluded levels are skipped",
+        default={LODLevel.HIGH.value,
+                 LODLevel.MEDIUM.value,
+                 LODLevel.LOW.value,
+                 LODLevel.VERYLOW.value},
+    )
+
     import_ext_skeleton: bpy.props.BoolProperty(
         name="Import External Skeleton",
         description="Imports the first found yft skeleton in the same folder as the selected file.",
@@ -583,6 +597,77 @@ class SollumzExportSettings(bpy.types.PropertyGroup):
         description="Exports a .ytyp.xml with an archetype for every drawable or drawable dictionary being exported.",
         default=False
     )
+    auto_lods: bpy.props.BoolProperty(
+        name="Generate LODs",
+        description="Generate medium, low and very low models by decimating the high models of drawables that only have a high LOD",
+        default=False
+    )
+    optimize_vertex_cache: bpy.props.BoolProperty(
+        name="Optimize Vertex Cache",
+        description="Reorder triangles for the GPU vertex cache and vertices for fetch locality. Slower to export",
+        default=False
+    )
+    merge_materials: bpy.props.BoolProperty(
+        name="Merge Materials",
+        description="Export materials with the same shader, textures and parameters as one shader, merging their geometries to save draw calls",
+        default=False
+    )
+    chunk_geometries: bpy.props.BoolProperty(
+        name="Split Into Chunks",
+        description="Split large geometries into spatial chunks with their own bounds so the game can cull parts of them",
+        default=False
+    )
+    chunk_triangles: bpy.props.IntProperty(
+        name="Chunk Triangles",
+        description="Maximum number of triangles of each chunk",
+        default=4096,
+        min=64
+    )
+    weld_position: bpy.props.FloatProperty(
+        name="Position",
+        description="Weld vertices whose positions snap to the same cell of a grid of this size. Lossy, 0 only welds identical positions",
+        default=0.0,
+        min=0.0,
+        precision=5,
+        subtype="DISTANCE"
+    )
+    weld_normal_angle: bpy.props.FloatProperty(
+        name="Normal Angle",
+        description="Weld vertices whose normals and tangents snap to the same cell of a grid of about this angle. Lossy, 0 only welds identical normals",
+        default=0.0,
+        min=0.0,
+        max=0.785398,
+        subtype="ANGLE"
+    )
+    weld_uv: bpy.props.FloatProperty(
+        name="UV",
+        description="Weld vertices whose UVs snap to the same cell of a grid of this size. Lossy, 0 only welds identical UVs",
+        default=0.0,
+        min=0.0,
+        precision=5
+    )
+    weld_colour: bpy.props.FloatProperty(
+        name="Colour",
+        description="Weld vertices whose colour channels snap to the same cell of a grid of this size (0 - 255). Lossy, 0 only welds identical colours",
+        default=0.0,
+        min=0.0,
+        max=255.0
+    )
+    export_report: bpy.props.BoolProperty(
+        name="Render Cost Report",
+        description="Write a report of the vertex, triangle, buffer, shader, texture and bone counts of every exported drawable to the output directory",
+        default=False
+    )
+    skip_unchanged: bpy.props.BoolProperty(
+        name="Skip Unchanged",
+        description="Skip objects that haven't changed since they were last exported to the output directory. Keeps a cache file in the output directory",
+        default=False
+    )
+    link_textures: bpy.props.BoolProperty(
+        name="Link Textures",
+        description="Hardlink embedded textures into the texture folders instead of copying them when they are on the same drive",
+        default=False
+    )
 
 
 def hide_obj_and_children(obj, value):
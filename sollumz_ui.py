@@ -64,6 +64,9 @@ class SOLLUMZ_PT_import_geometry(bpy.types.Panel):
 
         layout.prop(operator.import_settings, "join_geometries")
 
+        col = layout.column()
+        col.prop(operator.import_settings, "import_lods")
+
 
 class SOLLUMZ_PT_import_fragment(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
@@ -221,6 +224,7 @@ class SOLLUMZ_PT_export_include(bpy.types.Panel):
         col.prop(operator.export_settings, "sollum_types")
 
         layout.prop(operator.export_settings, "export_with_ytyp")
+        layout.prop(operator.export_settings, "skip_unchanged")
 
 
 class SOLLUMZ_PT_export_exclude(bpy.types.Panel):
@@ -269,6 +273,20 @@ class SOLLUMZ_PT_export_geometry(bpy.types.Panel):
         operator = sfile.active_operator
 
         layout.prop(operator.export_settings, "use_transforms")
+        layout.prop(operator.export_settings, "optimize_vertex_cache")
+        layout.prop(operator.export_settings, "auto_lods")
+        layout.prop(operator.export_settings, "merge_materials")
+        layout.prop(operator.export_settings, "export_report")
+        layout.prop(operator.export_settings, "chunk_geometries")
+        sublayout = layout.column()
+        sublayout.enabled = operator.export_settings.chunk_geometries
+        sublayout.prop(operator.export_settings, "chunk_triangles")
+
+        layout.label(text="Vertex Welding Tolerance")
+        layout.prop(operator.export_settings, "weld_position")
+        layout.prop(operator.export_settings, "weld_normal_angle")
+        layout.prop(operator.export_settings, "weld_uv")
+        layout.prop(operator.export_settings, "weld_colour")
 
 
 class SOLLUMZ_PT_export_fragment(bpy.types.Panel):
@@ -295,6 +313,30 @@ class SOLLUMZ_PT_export_fragment(bpy.types.Panel):
         layout.prop(operator.export_settings, "export_with_hi")
 
 
+class SOLLUMZ_PT_export_textures(bpy.types.Panel):
+    bl_space_type = 'FILE_BROWSER'
+    bl_region_type = 'TOOL_PROPS'
+    bl_label = "Textures"
+    bl_parent_id = "FILE_PT_operator"
+    bl_order = 5
+
+    @classmethod
+    def poll(cls, context):
+        sfile = context.space_data
+        operator = sfile.active_operator
+        return operator.bl_idname == "SOLLUMZ_OT_export"
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+
+        sfile = context.space_data
+        operator = sfile.active_operator
+
+        layout.prop(operator.export_settings, "link_textures")
+
+
 class SOLLUMZ_PT_TOOL_PANEL(bpy.types.Panel):
     bl_label = "General Tools"
     bl_idname = "SOLLUMZ_PT_TOOL_PANEL"
@@ -0,0 +1,150 @@
+"""Round trip of a ydd imported with the skeleton of the fragment next to it.
+
+Blender only: the addon package imports bpy, so this isn't collected by pytest. Run it with blender's python and the
+addon installed and enabled, for example:
+    blender --background --python tests/blender_test_ydd_external_skeleton.py
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+
+FRAGMENT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<Fragment>
+  <Name>test_ped</Name>
+  <Drawable>
+    <Name>test_ped</Name>
+    <Skeleton>
+      <Bones>
+        <Item>
+          <Name>SKEL_ROOT</Name>
+          <Tag value="0" />
+          <Index value="0" />
+          <ParentIndex value="-1" />
+          <SiblingIndex value="-1" />
+          <Flags />
+          <Translation x="0" y="0" z="0" />
+          <Rotation x="0" y="0" z="0" w="1" />
+          <Scale x="1" y="1" z="1" />
+          <TransformUnk x="0" y="4" z="-3" w="0" />
+        </Item>
+        <Item>
+          <Name>SKEL_Head</Name>
+          <Tag value="31086" />
+          <Index value="1" />
+          <ParentIndex value="0" />
+          <SiblingIndex value="-1" />
+          <Flags />
+          <Translation x="0" y="0" z="1" />
+          <Rotation x="0" y="0" z="0" w="1" />
+          <Scale x="1" y="1" z="1" />
+          <TransformUnk x="0" y="4" z="-3" w="0" />
+        </Item>
+      </Bones>
+    </Skeleton>
+  </Drawable>
+</Fragment>
+"""
+
+DRAWABLE_DICTIONARY_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<DrawableDictionary>
+  <Item>
+    <Name>head_000_r</Name>
+    <ShaderGroup>
+      <Shaders>
+        <Item>
+          <Name>default</Name>
+          <FileName>default.sps</FileName>
+          <RenderBucket value="0" />
+          <Parameters />
+        </Item>
+      </Shaders>
+    </ShaderGroup>
+    <DrawableModelsHigh>
+      <Item>
+        <RenderMask value="255" />
+        <Flags value="0" />
+        <HasSkin value="1" />
+        <BoneIndex value="0" />
+        <Unknown1 value="0" />
+        <Geometries>
+          <Item>
+            <ShaderIndex value="0" />
+            <BoundingBoxMin x="0" y="0" z="0" />
+            <BoundingBoxMax x="1" y="0" z="1" />
+            <BoneIDs>0, 1</BoneIDs>
+            <VertexBuffer>
+              <Flags value="0" />
+              <Layout type="GTAV1">
+                <Position />
+                <BlendWeights />
+                <BlendIndices />
+                <Normal />
+                <Colour0 />
+                <TexCoord0 />
+              </Layout>
+              <Data>
+                0 0 0   255 0 0 0   0 0 0 0   0 -1 0   255 255 255 255   0 0
+                1 0 0   255 0 0 0   0 0 0 0   0 -1 0   255 255 255 255   1 0
+                0 0 1   255 0 0 0   1 0 0 0   0 -1 0   255 255 255 255   0 1
+              </Data>
+            </VertexBuffer>
+            <IndexBuffer>
+              <Data>0 1 2</Data>
+            </IndexBuffer>
+          </Item>
+        </Geometries>
+      </Item>
+    </DrawableModelsHigh>
+  </Item>
+</DrawableDictionary>
+"""
+
+
+@unittest.skipIf(bpy is None, "requires blender")
+class TestYddExternalSkeleton(unittest.TestCase):
+
+    def setUp(self):
+        bpy.ops.wm.read_homefile(use_empty=True)
+        self.directory = tempfile.mkdtemp()
+        self.output_directory = os.path.join(self.directory, "export")
+        os.mkdir(self.output_directory)
+
+        with open(os.path.join(self.directory, "test_ped.yft.xml"), "w") as f:
+            f.write(FRAGMENT_XML)
+        self.filepath = os.path.join(self.directory, "test_ped.ydd.xml")
+        with open(self.filepath, "w") as f:
+            f.write(DRAWABLE_DICTIONARY_XML)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_export_keeps_external_skeleton(self):
+        result = getattr(bpy.ops.sollumz, "import")(
+            filepath=self.filepath, import_settings={"import_ext_skeleton": True})
+        self.assertEqual(result, {"FINISHED"})
+
+        result = bpy.ops.sollumz.export(directory=self.output_directory)
+        self.assertEqual(result, {"FINISHED"})
+
+        root = ET.parse(os.path.join(
+            self.output_directory, "test_ped.ydd.xml")).getroot()
+        drawable = root.find("Item")
+        self.assertIsNotNone(drawable.find("Skeleton"))
+        names = [bone.findtext("Name")
+                 for bone in drawable.findall("Skeleton/Bones/Item")]
+        self.assertEqual(names, ["SKEL_ROOT", "SKEL_Head"])
+        self.assertEqual(drawable.find(
+            "DrawableModelsHigh/Item/HasSkin").get("value"), "1")
+
+
+if __name__ == "__main__":
+    # blender keeps its own arguments in sys.argv
+    unittest.main(argv=[__file__])
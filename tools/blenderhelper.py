@@ -91,6 +91,31 @@ def join_objects(objs):
     return bpy.context.view_layer.objects.active
 
 
+SNAPSHOT_DATA_COLLECTIONS = ("objects", "meshes", "armatures", "lights", "materials",
+                             "node_groups", "textures", "images", "actions", "collections")
+
+
+def get_datablocks_snapshot():
+    """Get the pointers of every datablock that can be created by an import or export"""
+    return {name: set(block.as_pointer() for block in getattr(bpy.data, name))
+            for name in SNAPSHOT_DATA_COLLECTIONS}
+
+
+def remove_datablocks_since(snapshot, keep=()):
+    """Remove the datablocks created after the given snapshot was taken, except the ones whose pointer is in keep"""
+    if snapshot is None:
+        return
+
+    blocks = []
+    for name in SNAPSHOT_DATA_COLLECTIONS:
+        existing = snapshot[name]
+        blocks.extend(block for block in getattr(bpy.data, name)
+                      if block.as_pointer() not in existing and block.as_pointer() not in keep)
+
+    if blocks:
+        bpy.data.batch_remove(blocks)
+
+
 def remove_unused_materials(obj):
     bpy.ops.object.select_all(action='DESELECT')
     obj.select_set(True)
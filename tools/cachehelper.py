@@ -0,0 +1,284 @@
+import bpy
+import os
+import json
+import hashlib
+import numpy as np
+from .meshhelper import get_children_recursive
+
+
+MANIFEST_FILENAME = ".sollumz_export_cache.json"
+
+
+def get_addon_version():
+    from .. import bl_info
+    return bl_info["version"]
+
+
+def hash_value(h, value):
+    if isinstance(value, set):
+        value = sorted(value)
+    h.update(repr(value).encode())
+
+
+def hash_array(h, collection, attr, size, dtype=np.float32):
+    data = np.empty(len(collection) * size, dtype=dtype)
+    collection.foreach_get(attr, data)
+    h.update(data.tobytes())
+
+
+def hash_id_properties(h, block):
+    """Hash the custom (ID) properties of a struct"""
+    for key in sorted(block.keys()):
+        value = block[key]
+        if hasattr(value, "to_dict"):
+            value = value.to_dict()
+        elif hasattr(value, "to_list"):
+            value = value.to_list()
+        hash_value(h, (key, value))
+
+
+def hash_file_stat(h, filepath):
+    try:
+        stat = os.stat(bpy.path.abspath(filepath))
+        hash_value(h, (stat.st_size, stat.st_mtime_ns))
+    except OSError:
+        hash_value(h, None)
+
+
+class ExportHasher:
+    """Builds a stable hash of everything an exported object depends on"""
+
+    def __init__(self):
+        self.h = hashlib.sha1()
+        self.hashed_ids = set()
+
+    def hash_struct(self, struct, runtime_only=False, depth=1):
+        """Hash the rna properties of struct. Data-blocks it points to are hashed once, nested blender structs up to
+        depth and nested property groups completely."""
+        for prop in struct.bl_rna.properties:
+            if prop.identifier == "rna_type" or (runtime_only and not prop.is_runtime):
+                continue
+            try:
+                value = getattr(struct, prop.identifier)
+            except AttributeError:
+                continue
+
+            hash_value(self.h, prop.identifier)
+            if prop.type == "POINTER":
+                if value is None:
+                    hash_value(self.h, None)
+                elif isinstance(value, bpy.types.ID):
+                    self.hash_id(value)
+                else:
+                    self.hash_nested_struct(value, depth)
+            elif prop.type == "COLLECTION":
+                hash_value(self.h, len(value))
+                for item in value:
+                    self.hash_nested_struct(item, depth)
+            elif prop.type in ("FLOAT", "INT", "BOOLEAN") and prop.array_length > 0:
+                hash_value(self.h, np.array(value).ravel().tolist())
+            else:
+                hash_value(self.h, value)
+
+    def hash_nested_struct(self, struct, depth):
+        # Property groups only nest other property groups or point to data-blocks, so they can't recurse forever
+        if isinstance(struct, bpy.types.PropertyGroup):
+            self.hash_struct(struct, depth=depth)
+        elif depth > 0:
+            self.hash_struct(struct, depth=depth - 1)
+
+    def hash_id(self, block):
+        hash_value(self.h, (type(block).__name__, block.name))
+        key = (type(block).__name__, block.name)
+        if key in self.hashed_ids:
+            return
+        self.hashed_ids.add(key)
+
+        if isinstance(block, bpy.types.Material):
+            self.hash_material(block)
+        elif isinstance(block, bpy.types.Image):
+            hash_value(self.h, (block.filepath, tuple(block.size)))
+            hash_file_stat(self.h, block.filepath)
+        elif isinstance(block, bpy.types.Action):
+            self.hash_action(block)
+        elif isinstance(block, bpy.types.Armature):
+            self.hash_armature(block)
+        elif isinstance(block, bpy.types.Light):
+            self.hash_struct(block, depth=0)
+        elif isinstance(block, bpy.types.Object) and block.type == "ARMATURE":
+            # Armatures outside of the exported objects, such as the target of an armature modifier, provide the
+            # skeleton of the drawables they deform
+            self.hash_armature_object(block)
+
+    def hash_material(self, mat):
+        self.hash_struct(mat, runtime_only=True)
+        hash_value(self.h, mat.blend_method)
+        if not mat.node_tree:
+            return
+
+        for node in sorted(mat.node_tree.nodes, key=lambda n: n.name):
+            hash_value(self.h, (node.name, node.bl_idname))
+            self.hash_struct(node, runtime_only=True)
+            if isinstance(node, bpy.types.ShaderNodeTexImage):
+                hash_value(self.h, (node.interpolation, node.extension))
+                if node.image:
+                    self.hash_id(node.image)
+            for socket in list(node.inputs) + list(node.outputs):
+                if hasattr(socket, "default_value"):
+                    value = socket.default_value
+                    hash_value(self.h, value if isinstance(value, (int, float, str, bool))
+                               else np.array(value).ravel().tolist())
+
+        for link in mat.node_tree.links:
+            hash_value(self.h, (link.from_node.name, link.from_socket.identifier,
+                                link.to_node.name, link.to_socket.identifier))
+
+    def hash_action(self, action):
+        for fcurve in sorted(action.fcurves, key=lambda f: (f.data_path, f.array_index)):
+            hash_value(self.h, (fcurve.data_path, fcurve.array_index))
+            hash_array(self.h, fcurve.keyframe_points, "co", 2)
+            hash_array(self.h, fcurve.keyframe_points, "handle_left", 2)
+            hash_array(self.h, fcurve.keyframe_points, "handle_right", 2)
+            hash_value(self.h, [k.interpolation for k in fcurve.keyframe_points])
+
+    def hash_armature(self, armature):
+        for bone in armature.bones:
+            hash_value(self.h, (bone.name, bone.parent.name if bone.parent else None,
+                                bone.use_connect, bone.use_deform))
+            hash_value(self.h, np.array(bone.matrix_local).ravel().tolist())
+            hash_value(self.h, (tuple(bone.head_local), tuple(bone.tail_local)))
+            self.hash_struct(bone, runtime_only=True)
+            hash_id_properties(self.h, bone)
+
+    def hash_armature_object(self, obj):
+        self.hash_id(obj.data)
+        for pbone in obj.pose.bones:
+            hash_value(self.h, np.array(
+                pbone.matrix_basis).ravel().tolist())
+            for constraint in pbone.constraints:
+                self.hash_struct(constraint, depth=0)
+
+    def hash_mesh(self, mesh):
+        hash_array(self.h, mesh.vertices, "co", 3)
+        hash_array(self.h, mesh.loops, "vertex_index", 1, np.int32)
+        hash_array(self.h, mesh.polygons, "loop_start", 1, np.int32)
+        hash_array(self.h, mesh.polygons, "loop_total", 1, np.int32)
+        hash_array(self.h, mesh.polygons, "material_index", 1, np.int32)
+        hash_array(self.h, mesh.polygons, "use_smooth", 1, bool)
+
+        mesh.calc_normals_split()
+        hash_array(self.h, mesh.loops, "normal", 3)
+
+        for layer in mesh.uv_layers:
+            hash_value(self.h, layer.name)
+            hash_array(self.h, layer.data, "uv", 2)
+        for layer in mesh.vertex_colors:
+            hash_value(self.h, layer.name)
+            hash_array(self.h, layer.data, "color", 4)
+
+        hash_value(self.h, [[(g.group, g.weight) for g in v.groups]
+                            for v in mesh.vertices])
+
+        for mat in mesh.materials:
+            if mat is None:
+                hash_value(self.h, None)
+            else:
+                self.hash_id(mat)
+
+    def hash_object(self, obj, depsgraph, use_transforms):
+        hash_value(self.h, (obj.name, obj.type, obj.sollum_type,
+                            obj.parent.name if obj.parent else None, obj.parent_type, obj.parent_bone))
+        hash_value(self.h, np.array(obj.matrix_basis).ravel().tolist())
+        if use_transforms:
+            hash_value(self.h, np.array(obj.matrix_world).ravel().tolist())
+
+        self.hash_struct(obj, runtime_only=True)
+        hash_id_properties(self.h, obj)
+        hash_value(self.h, [g.name for g in obj.vertex_groups])
+        for modifier in obj.modifiers:
+            self.hash_struct(modifier, depth=0)
+        for constraint in obj.constraints:
+            self.hash_struct(constraint, depth=0)
+
+        if obj.type == "MESH":
+            obj_eval = obj.evaluated_get(depsgraph)
+            mesh = obj_eval.to_mesh()
+            try:
+                self.hash_mesh(mesh)
+            finally:
+                obj_eval.to_mesh_clear()
+        elif obj.type == "ARMATURE":
+            self.hash_armature_object(obj)
+        elif obj.data is not None:
+            self.hash_id(obj.data)
+
+    def hexdigest(self):
+        return self.h.hexdigest()
+
+
+def get_export_hash(obj, export_settings):
+    """Get a stable hash of obj, its children, their data and the export settings"""
+    hasher = ExportHasher()
+    hash_value(hasher.h, get_addon_version())
+    hasher.hash_struct(export_settings, runtime_only=True)
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    objects = [obj] + sorted(get_children_recursive(obj),
+                             key=lambda child: child.name)
+    for child in objects:
+        hasher.hash_object(child, depsgraph, export_settings.use_transforms)
+
+    return hasher.hexdigest()
+
+
+def get_file_signature(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ExportManifest:
+    """Hashes of the objects exported to a directory, used to skip exporting objects that haven't changed"""
+
+    def __init__(self, directory):
+        self.filepath = os.path.join(directory, MANIFEST_FILENAME)
+        self.entries = {}
+        if os.path.isfile(self.filepath):
+            try:
+                with open(self.filepath, "r") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                # Corrupted manifest, everything will be exported again
+                self.entries = {}
+
+    def is_up_to_date(self, filepath, export_hash):
+        entry = self.entries.get(os.path.basename(filepath))
+        if entry is None or entry["hash"] != export_hash:
+            return False
+
+        directory = os.path.dirname(filepath)
+        for name, signature in entry["files"].items():
+            if signature is None or get_file_signature(os.path.join(directory, name)) != signature:
+                return False
+
+        return True
+
+    def update(self, filepath, export_hash, output_files):
+        """Record the hash of an exported object and the signatures of its output files, paths relative to the
+        directory. Objects with a missing output file are forgotten so the next export writes them again."""
+        directory = os.path.dirname(filepath)
+        files = {os.path.relpath(path, directory): get_file_signature(path) for path in output_files}
+        if any(signature is None for signature in files.values()):
+            self.entries.pop(os.path.basename(filepath), None)
+            return
+
+        self.entries[os.path.basename(filepath)] = {
+            "hash": export_hash,
+            "files": files,
+        }
+
+    def save(self):
+        with open(self.filepath, "w") as f:
+            json.dump(self.entries, f, indent=4, sort_keys=True)
@@ -0,0 +1,160 @@
+import os
+import struct
+import collections
+
+DDS_MAGIC = b"DDS "
+DDS_HEADER_SIZE = 128
+DDS_DX10_HEADER_SIZE = 20
+
+# DDS_HEADER flags
+DDSD_MIPMAPCOUNT = 0x20000
+# DDS_PIXELFORMAT flags
+DDPF_ALPHAPIXELS = 0x1
+DDPF_ALPHA = 0x2
+DDPF_FOURCC = 0x4
+DDPF_RGB = 0x40
+DDPF_LUMINANCE = 0x20000
+
+FOURCC_FORMATS = {
+    b"DXT1": "D3DFMT_DXT1",
+    b"DXT3": "D3DFMT_DXT3",
+    b"DXT5": "D3DFMT_DXT5",
+    b"ATI1": "D3DFMT_ATI1",
+    b"BC4U": "D3DFMT_ATI1",
+    b"ATI2": "D3DFMT_ATI2",
+    b"BC5U": "D3DFMT_ATI2",
+}
+
+DXGI_FORMATS = {
+    28: "D3DFMT_A8B8G8R8",  # R8G8B8A8_UNORM
+    29: "D3DFMT_A8B8G8R8",  # R8G8B8A8_UNORM_SRGB
+    61: "D3DFMT_L8",  # R8_UNORM
+    65: "D3DFMT_A8",  # A8_UNORM
+    71: "D3DFMT_DXT1",  # BC1_UNORM
+    72: "D3DFMT_DXT1",  # BC1_UNORM_SRGB
+    74: "D3DFMT_DXT3",  # BC2_UNORM
+    75: "D3DFMT_DXT3",  # BC2_UNORM_SRGB
+    77: "D3DFMT_DXT5",  # BC3_UNORM
+    78: "D3DFMT_DXT5",  # BC3_UNORM_SRGB
+    80: "D3DFMT_ATI1",  # BC4_UNORM
+    83: "D3DFMT_ATI2",  # BC5_UNORM
+    86: "D3DFMT_A1R5G5B5",  # B5G5R5A1_UNORM
+    87: "D3DFMT_A8R8G8B8",  # B8G8R8A8_UNORM
+    88: "D3DFMT_X8R8G8B8",  # B8G8R8X8_UNORM
+    91: "D3DFMT_A8R8G8B8",  # B8G8R8A8_UNORM_SRGB
+    98: "D3DFMT_BC7",  # BC7_UNORM
+    99: "D3DFMT_BC7",  # BC7_UNORM_SRGB
+}
+
+# Bytes per 4x4 block of the block compressed formats
+BLOCK_SIZES = {
+    "D3DFMT_DXT1": 8,
+    "D3DFMT_ATI1": 8,
+    "D3DFMT_DXT3": 16,
+    "D3DFMT_DXT5": 16,
+    "D3DFMT_ATI2": 16,
+    "D3DFMT_BC7": 16,
+}
+
+# Bytes per pixel of the uncompressed formats
+PIXEL_SIZES = {
+    "D3DFMT_A8R8G8B8": 4,
+    "D3DFMT_X8R8G8B8": 4,
+    "D3DFMT_A8B8G8R8": 4,
+    "D3DFMT_A1R5G5B5": 2,
+    "D3DFMT_A8": 1,
+    "D3DFMT_L8": 1,
+}
+
+DDSInfo = collections.namedtuple(
+    "DDSInfo", ["width", "height", "mip_levels", "format"])
+
+# Headers already read, keyed by (filepath, size, modification time)
+dds_info_cache = {}
+
+
+def get_uncompressed_format(flags, bit_count, r_mask, a_mask):
+    if flags & DDPF_RGB:
+        if bit_count == 32:
+            if r_mask == 0xFF:
+                return "D3DFMT_A8B8G8R8"
+            return "D3DFMT_A8R8G8B8" if flags & DDPF_ALPHAPIXELS and a_mask else "D3DFMT_X8R8G8B8"
+        if bit_count == 16 and a_mask == 0x8000:
+            return "D3DFMT_A1R5G5B5"
+    elif flags & DDPF_ALPHA and bit_count == 8:
+        return "D3DFMT_A8"
+    elif flags & DDPF_LUMINANCE and bit_count == 8:
+        return "D3DFMT_L8"
+    return None
+
+
+def parse_dds_header(data):
+    """Get the DDSInfo of the header at the start of data, None if it isn't a DDS header. format is the CodeWalker
+    name of the pixel format, None if it has no GTA equivalent."""
+    if len(data) < DDS_HEADER_SIZE or data[:4] != DDS_MAGIC:
+        return None
+
+    flags, height, width = struct.unpack_from("<3I", data, 8)
+    mip_levels = struct.unpack_from("<I", data, 28)[0]
+    pf_flags, fourcc, bit_count, r_mask, g_mask, b_mask, a_mask = struct.unpack_from(
+        "<I4s5I", data, 80)
+
+    texture_format = None
+    if pf_flags & DDPF_FOURCC:
+        if fourcc == b"DX10":
+            if len(data) < DDS_HEADER_SIZE + DDS_DX10_HEADER_SIZE:
+                return None
+            texture_format = DXGI_FORMATS.get(
+                struct.unpack_from("<I", data, DDS_HEADER_SIZE)[0])
+        else:
+            texture_format = FOURCC_FORMATS.get(fourcc)
+    else:
+        texture_format = get_uncompressed_format(
+            pf_flags, bit_count, r_mask, a_mask)
+
+    # Many writers fill dwMipMapCount without setting DDSD_MIPMAPCOUNT, so use any stored count and only fall back to
+    # a single level when there is none
+    return DDSInfo(width, height, max(mip_levels, 1), texture_format)
+
+
+def read_dds_info(filepath):
+    """Read the size, mip levels and pixel format of a DDS file from its header, without reading the pixels. Returns
+    None if the file can't be read or isn't a DDS file."""
+    try:
+        stat = os.stat(filepath)
+    except (OSError, TypeError, ValueError):
+        return None
+
+    key = (filepath, stat.st_size, stat.st_mtime_ns)
+    if key in dds_info_cache:
+        return dds_info_cache[key]
+
+    try:
+        with open(filepath, "rb") as f:
+            info = parse_dds_header(
+                f.read(DDS_HEADER_SIZE + DDS_DX10_HEADER_SIZE))
+    except OSError:
+        return None
+
+    dds_info_cache[key] = info
+    return info
+
+
+def get_dds_data_size(info):
+    """Get the size in bytes of the pixel data of every mip level of a texture, None for unknown formats"""
+    block_size = BLOCK_SIZES.get(info.format)
+    pixel_size = PIXEL_SIZES.get(info.format)
+    if block_size is None and pixel_size is None:
+        return None
+
+    size = 0
+    width, height = info.width, info.height
+    for _ in range(info.mip_levels):
+        if block_size is not None:
+            size += max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * block_size
+        else:
+            size += width * height * pixel_size
+        width = max(1, width // 2)
+        height = max(1, height // 2)
+
+    return size
@@ -1,7 +1,10 @@
 def Generate(text, encoding='utf-8'):
+    return Finalize(Accumulate(0, text, encoding))
 
+
+def Accumulate(h, text, encoding='utf-8'):
+    """Continue the hash h with text, so a long string can be hashed in parts"""
     bts = text.lower().encode(encoding)
-    h = 0
 
     for b in bts:
         h += b
@@ -11,6 +14,10 @@ def Generate(text, encoding='utf-8'):
         h ^= (h >> 6) & 0xFFFFFFFF
         h &= 0xFFFFFFFF
 
+    return h
+
+
+def Finalize(h):
     h += (h << 3) & 0xFFFFFFFF
     h &= 0xFFFFFFFF
     h ^= (h >> 11) & 0xFFFFFFFF
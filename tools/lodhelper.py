@@ -0,0 +1,153 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+# Fraction of the high LOD vertices kept by each generated LOD
+LOD_RATIOS = {
+    "medium": 0.5,
+    "low": 0.25,
+    "very_low": 0.1,
+}
+# A LOD is only kept if it removes at least this fraction of the vertices of the previous one
+MIN_REDUCTION = 0.1
+# Maximum number of decimated geometries kept between exports
+LOD_CACHE_SIZE = 512
+
+# Decimated (vertices, indices) keyed by content hash of the source geometry and the target ratio
+lod_cache = OrderedDict()
+
+
+def get_lod_distances(radius):
+    """Get default lod distances (high, medium, low, very low) for a drawable with a bounding sphere radius"""
+    high = max(30.0, radius * 8.0)
+    return tuple(min(high * scale, 9998.0) for scale in (1, 2, 4, 8))
+
+
+def get_triangle_quadrics(positions, triangles):
+    """Get the area weighted plane quadric (A, b, c) of every triangle, error(x) = x.A.x + 2b.x + c"""
+    v0, v1, v2 = (positions[triangles[:, i]] for i in range(3))
+    normals = np.cross(v1 - v0, v2 - v0)
+    areas = np.linalg.norm(normals, axis=1)
+    valid = areas > 1e-12
+    normals[valid] /= areas[valid, None]
+    normals[~valid] = 0
+    d = -np.einsum("ij,ij->i", normals, v0)
+
+    weights = areas[:, None, None]
+    A = normals[:, :, None] * normals[:, None, :] * weights
+    b = normals * (d * areas)[:, None]
+    c = d * d * areas
+    return A, b, c
+
+
+def cluster_vertices(positions, cell_size):
+    origin = positions.min(axis=0)
+    cells = np.floor((positions - origin) / cell_size).astype(np.int64)
+    _, clusters = np.unique(cells, axis=0, return_inverse=True)
+    return clusters.ravel()
+
+
+def find_cell_size(positions, target_count):
+    """Binary search a grid cell size that clusters positions into about target_count cells"""
+    extent = (positions.max(axis=0) - positions.min(axis=0)).max()
+    if extent <= 0:
+        return 1.0
+
+    low, high = extent / 4096.0, extent
+    for _ in range(16):
+        cell_size = (low + high) / 2
+        count = cluster_vertices(positions, cell_size).max() + 1
+        if count > target_count:
+            low = cell_size
+        else:
+            high = cell_size
+    return high
+
+
+def decimate_geometry(vertices, indices, ratio):
+    """Decimate an indexed triangle list with quadric error vertex clustering. Vertices are clustered on a grid, each
+    cluster is collapsed to the position minimizing the summed plane quadrics of its triangles, and keeps the other
+    attributes of its vertex closest to that position. Returns the new vertices and indices."""
+    positions = vertices["position"].astype(np.float64)
+    triangles = indices.reshape(-1, 3).astype(np.int64)
+    if len(triangles) == 0:
+        return vertices, indices
+
+    clusters = cluster_vertices(positions, find_cell_size(
+        positions, max(int(len(vertices) * ratio), 4)))
+    cluster_count = clusters.max() + 1
+
+    # Sum the quadrics of each triangle into its vertices, then the vertices into their cluster
+    tri_A, tri_b, tri_c = get_triangle_quadrics(positions, triangles)
+    A = np.zeros((cluster_count, 3, 3))
+    b = np.zeros((cluster_count, 3))
+    for i in range(3):
+        np.add.at(A, clusters[triangles[:, i]], tri_A)
+        np.add.at(b, clusters[triangles[:, i]], tri_b)
+
+    counts = np.bincount(clusters, minlength=cluster_count)
+    means = np.zeros((cluster_count, 3))
+    np.add.at(means, clusters, positions)
+    means /= np.maximum(counts, 1)[:, None]
+
+    # Regularize towards the cluster mean so flat or degenerate clusters still have a solution
+    scale = np.trace(A, axis1=1, axis2=2)[:, None] * 1e-3 + 1e-9
+    optimal = np.linalg.solve(
+        A + np.eye(3) * scale[:, :, None], (-b + means * scale)[:, :, None])[:, :, 0]
+
+    # Keep optimal positions within the bounds of their cluster
+    mins = np.full((cluster_count, 3), np.inf)
+    maxs = np.full((cluster_count, 3), -np.inf)
+    np.minimum.at(mins, clusters, positions)
+    np.maximum.at(maxs, clusters, positions)
+    optimal = np.clip(optimal, mins, maxs)
+
+    # Representative vertex of each cluster is the one closest to its optimal position
+    distances = np.linalg.norm(positions - optimal[clusters], axis=1)
+    order = np.lexsort((distances, clusters))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = clusters[order][1:] != clusters[order][:-1]
+    representatives = order[first]
+
+    new_vertices = vertices[representatives].copy()
+    new_vertices["position"] = optimal
+
+    # Drop triangles that collapsed and triangles that became duplicates
+    new_triangles = clusters[triangles]
+    valid = (new_triangles[:, 0] != new_triangles[:, 1]) & (new_triangles[:, 1] != new_triangles[:, 2]) & (
+        new_triangles[:, 0] != new_triangles[:, 2])
+    new_triangles = new_triangles[valid]
+    _, unique_tris = np.unique(np.sort(new_triangles, axis=1),
+                               axis=0, return_index=True)
+    new_triangles = new_triangles[np.sort(unique_tris)]
+
+    # Remove clusters that are no longer used by any triangle
+    used = np.unique(new_triangles)
+    remap = np.zeros(cluster_count, dtype=np.uint32)
+    remap[used] = np.arange(len(used), dtype=np.uint32)
+
+    return new_vertices[used], remap[new_triangles].ravel()
+
+
+def get_geometry_hash(vertices, indices, ratio):
+    h = hashlib.sha1()
+    h.update(str(vertices.dtype).encode())
+    h.update(np.ascontiguousarray(vertices).tobytes())
+    h.update(np.ascontiguousarray(indices, dtype=np.uint32).tobytes())
+    h.update(repr(ratio).encode())
+    return h.digest()
+
+
+def get_decimated_geometry(vertices, indices, ratio):
+    """Get a decimated copy of a geometry, reusing the result of a previous export if the geometry hasn't changed"""
+    key = get_geometry_hash(vertices, indices, ratio)
+    if key in lod_cache:
+        lod_cache.move_to_end(key)
+        return lod_cache[key]
+
+    result = decimate_geometry(vertices, indices, ratio)
+    lod_cache[key] = result
+    if len(lod_cache) > LOD_CACHE_SIZE:
+        lod_cache.popitem(last=False)
+
+    return result
@@ -1,5 +1,7 @@
 import bpy
 import bmesh
+import itertools
+import numpy as np
 from mathutils import Vector, Matrix
 from mathutils.geometry import distance_point_to_plane
 from math import radians
@@ -258,28 +260,87 @@ def get_bound_extents(obj, world=True, margin=0):
     return min, max
 
 
+class ExportCache:
+    """Data computed from objects during an export, so it is computed once per object no matter how many times the
+    export needs it. Only used between begin and end, outside of an export everything is computed every time."""
+    active = False
+    # Bound box corners of an object and its children, keyed by (object pointer, world)
+    bounds = {}
+    # Triangulated mesh copy of an evaluated object, keyed by object pointer
+    meshes = {}
+    # Vertex and index buffers built from the triangulated meshes
+    buffers = {}
+    # Minimal bounding sphere (center, radius) of an object and its children, keyed by (object pointer, world)
+    spheres = {}
+
+    @staticmethod
+    def begin():
+        ExportCache.end()
+        ExportCache.active = True
+
+    @staticmethod
+    def end():
+        ExportCache.active = False
+        ExportCache.bounds.clear()
+        ExportCache.buffers.clear()
+        ExportCache.spheres.clear()
+        for mesh in ExportCache.meshes.values():
+            if is_valid_datablock(mesh):
+                bpy.data.meshes.remove(mesh)
+        ExportCache.meshes.clear()
+
+    @staticmethod
+    def get_mesh(key):
+        """Get the cached mesh copy of an object, None if there is none or it was removed since"""
+        mesh = ExportCache.meshes.get(key)
+        if mesh is not None and not is_valid_datablock(mesh):
+            del ExportCache.meshes[key]
+            return None
+        return mesh
+
+    @staticmethod
+    def get_datablocks():
+        """Get the pointers of the mesh copies owned by the cache"""
+        return set(mesh.as_pointer() for mesh in ExportCache.meshes.values() if is_valid_datablock(mesh))
+
+
+def is_valid_datablock(block):
+    try:
+        block.name
+    except ReferenceError:
+        return False
+    return True
+
+
 def get_total_bounds(obj, world=True):
+    key = (obj.as_pointer(), world)
+    if ExportCache.active and key in ExportCache.bounds:
+        return [corner.copy() for corner in ExportCache.bounds[key]]
+
     objects = []
 
     # Ensure all objects are meshes
-    for obj in [obj, *get_children_recursive(obj)]:
-        if obj.type == "MESH":
-            objects.append(obj)
+    for child in [obj, *get_children_recursive(obj)]:
+        if child.type == "MESH":
+            objects.append(child)
 
     if len(objects) < 1:
         raise ValueError(
             f"Could not calculate extents for '{obj.name}': Object has no geometry data or children with geometry data (object is empty).")
 
     corners = []
-    for obj in objects:
-        for pos in obj.bound_box:
-            corner = obj.matrix_world @ Vector(
-                pos) if world else obj.matrix_basis @ Vector(pos)
+    for child in objects:
+        for pos in child.bound_box:
+            corner = child.matrix_world @ Vector(
+                pos) if world else child.matrix_basis @ Vector(pos)
             # Need to offset collisions by center of geometry
-            if not world and obj.parent and obj.parent.sollum_type in [SollumType.BOUND_GEOMETRY, SollumType.BOUND_GEOMETRYBVH]:
-                corner += obj.parent.location
+            if not world and child.parent and child.parent.sollum_type in [SollumType.BOUND_GEOMETRY, SollumType.BOUND_GEOMETRYBVH]:
+                corner += child.parent.location
             corners.append(corner)
 
+    if ExportCache.active:
+        ExportCache.bounds[key] = [corner.copy() for corner in corners]
+
     return corners
 
 
@@ -311,10 +372,225 @@ def get_children_recursive(obj):
     return children
 
 
+def get_used_bone_count(vertex_bones, vertex_indices):
+    bones = vertex_bones[vertex_indices]
+    return len(np.unique(bones[bones != -1]))
+
+
+def split_triangles_spatially(positions, triangles, max_vertices, max_triangles=None, vertex_bones=None, max_bones=None):
+    """Recursively split triangles in two halves along the longest axis of their centroids until every part uses at
+    most max_vertices vertices, and has at most max_triangles triangles if it is given. With vertex_bones, the bones
+    (-1 for none) influencing each vertex, parts are also split until they use at most max_bones bones. Returns a list
+    of triangle index arrays, each in the original triangle order."""
+    parts = []
+    pending = [np.arange(len(triangles))]
+    while pending:
+        tri_indices = pending.pop()
+        vertex_indices = np.unique(triangles[tri_indices])
+        if len(tri_indices) <= 1 or ((max_triangles is None or len(tri_indices) <= max_triangles) and
+                                     len(vertex_indices) <= max_vertices and
+                                     (vertex_bones is None or get_used_bone_count(vertex_bones, vertex_indices) <= max_bones)):
+            parts.append(np.sort(tri_indices))
+            continue
+
+        centroids = positions[triangles[tri_indices]].mean(axis=1)
+        axis = np.argmax(centroids.max(axis=0) - centroids.min(axis=0))
+        order = np.argsort(centroids[:, axis], kind="stable")
+        half = len(order) // 2
+        pending.append(tri_indices[order[half:]])
+        pending.append(tri_indices[order[:half]])
+
+    return parts
+
+
 def get_sphere_radius(bbmax, bbcenter):
     return (bbmax - bbcenter).length
 
 
+def get_total_positions(obj, world=True):
+    """Get the evaluated vertex positions of obj and its children, transformed like get_total_bounds"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    positions = []
+    for child in [obj, *get_children_recursive(obj)]:
+        if child.type != "MESH":
+            continue
+
+        child_eval = child.evaluated_get(depsgraph)
+        mesh = child_eval.to_mesh()
+        try:
+            co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", co)
+        finally:
+            child_eval.to_mesh_clear()
+
+        mat = np.array(child.matrix_world if world else child.matrix_basis)
+        co = co.reshape(-1, 3).astype(np.float64) @ mat[:3, :3].T + mat[:3, 3]
+        # Need to offset collisions by center of geometry
+        if not world and child.parent and child.parent.sollum_type in [SollumType.BOUND_GEOMETRY, SollumType.BOUND_GEOMETRYBVH]:
+            co += np.array(child.parent.location)
+        positions.append(co)
+
+    if len(positions) == 0:
+        return np.empty((0, 3))
+
+    return np.concatenate(positions)
+
+
+def get_extreme_directions(count=64):
+    """Get directions spread evenly over the unit sphere, the extreme points of a point set along them lie on its hull"""
+    i = np.arange(count) + 0.5
+    phi = np.arccos(1 - 2 * i / count)
+    theta = np.pi * (1 + 5 ** 0.5) * i
+    return np.stack((np.cos(theta) * np.sin(phi), np.sin(theta) * np.sin(phi), np.cos(phi)), axis=1)
+
+
+def get_circumsphere(points):
+    """Get the smallest sphere with 1 to 4 points on its surface, None if the points are degenerate"""
+    p0 = points[0]
+    if len(points) == 1:
+        return p0, 0.0
+    if len(points) == 2:
+        center = (p0 + points[1]) / 2
+        return center, np.linalg.norm(points[1] - center)
+    if len(points) == 3:
+        a = points[1] - p0
+        b = points[2] - p0
+        axb = np.cross(a, b)
+        denom = 2 * axb.dot(axb)
+        if denom < 1e-18:
+            return None
+        center = p0 + (a.dot(a) * np.cross(b, axb) +
+                       b.dot(b) * np.cross(axb, a)) / denom
+        return center, np.linalg.norm(p0 - center)
+
+    A = 2 * (points[1:] - p0)
+    if abs(np.linalg.det(A)) < 1e-18:
+        return None
+    center = np.linalg.solve(A, (points[1:] ** 2).sum(axis=1) - p0.dot(p0))
+    return center, np.linalg.norm(p0 - center)
+
+
+def get_boundary_sphere(boundary):
+    """Get the smallest sphere with every point of boundary on its surface"""
+    sphere = get_circumsphere(np.array(boundary))
+    if sphere is not None or len(boundary) < 3:
+        return sphere
+
+    # Degenerate boundary, use the smallest sphere through some of its points that contains the others
+    best = None
+    for size in range(2, len(boundary)):
+        for subset in itertools.combinations(boundary, size):
+            candidate = get_circumsphere(np.array(subset))
+            if candidate is None or (best is not None and candidate[1] >= best[1]):
+                continue
+            if all(is_in_sphere(point, candidate) for point in boundary):
+                best = candidate
+    return best
+
+
+def is_in_sphere(point, sphere):
+    return np.linalg.norm(point - sphere[0]) <= sphere[1] * (1 + 1e-7) + 1e-7
+
+
+def get_welzl_sphere(points):
+    """Get the minimal enclosing sphere of a small set of points, with the incremental form of Welzl's algorithm"""
+    points = points[np.random.default_rng(0).permutation(len(points))]
+    sphere = (points[0], 0.0)
+    for i in range(1, len(points)):
+        if is_in_sphere(points[i], sphere):
+            continue
+        sphere = (points[i], 0.0)
+        for j in range(i):
+            if is_in_sphere(points[j], sphere):
+                continue
+            sphere = get_boundary_sphere([points[i], points[j]])
+            for k in range(j):
+                if is_in_sphere(points[k], sphere):
+                    continue
+                sphere = get_boundary_sphere([points[i], points[j], points[k]])
+                for l in range(k):
+                    if is_in_sphere(points[l], sphere):
+                        continue
+                    sphere = get_boundary_sphere(
+                        [points[i], points[j], points[k], points[l]])
+    return sphere
+
+
+def get_ritter_sphere(points):
+    """Get an enclosing sphere with Ritter's method, at most a few percent larger than the minimal one"""
+    p = points[np.argmax(np.linalg.norm(points - points[0], axis=1))]
+    q = points[np.argmax(np.linalg.norm(points - p, axis=1))]
+    center = (p + q) / 2
+    radius = np.linalg.norm(q - center)
+
+    distances = np.linalg.norm(points - center, axis=1)
+    while distances.max() > radius:
+        farthest = np.argmax(distances)
+        distance = distances[farthest]
+        radius = (radius + distance) / 2
+        center = center + (points[farthest] - center) * \
+            ((distance - radius) / distance)
+        distances = np.linalg.norm(points - center, axis=1)
+        # Floating point error can leave the farthest point just outside
+        radius = max(radius, distances[farthest])
+
+    return center, radius
+
+
+def get_minimal_sphere(points, max_iterations=16):
+    """Get the (center, radius) of the minimal sphere enclosing points. The exact sphere of the extreme points along
+    many directions (points on the hull) is refined by adding the points left outside of it until it encloses every
+    point. Ritter's sphere is returned if that doesn't converge."""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) == 0:
+        return None
+
+    ritter = get_ritter_sphere(points)
+    projections = points @ get_extreme_directions().T
+    candidates = np.unique(np.concatenate(
+        (projections.argmax(axis=0), projections.argmin(axis=0))))
+
+    for _ in range(max_iterations):
+        sphere = get_welzl_sphere(points[candidates])
+        if sphere is None:
+            break
+        distances = np.linalg.norm(points - sphere[0], axis=1)
+        outside = np.flatnonzero(distances > sphere[1] * (1 + 1e-6) + 1e-6)
+        if len(outside) == 0:
+            return sphere if sphere[1] < ritter[1] else ritter
+        # Add the farthest points that were left outside
+        farthest = outside[np.argsort(distances[outside])[-8:]]
+        candidates = np.union1d(candidates, farthest)
+
+    return ritter
+
+
+def get_bound_sphere(obj, world=True):
+    """Get the center and radius of the minimal sphere enclosing the vertices of obj and its children. Falls back to
+    the sphere around the bound box of obj."""
+    key = (obj.as_pointer(), world)
+    if ExportCache.active and key in ExportCache.spheres:
+        center, radius = ExportCache.spheres[key]
+        return center.copy(), radius
+
+    sphere = None
+    try:
+        sphere = get_minimal_sphere(get_total_positions(obj, world))
+    except (ValueError, np.linalg.LinAlgError):
+        sphere = None
+
+    bbmin, bbmax = get_bound_extents(obj, world)
+    center = get_bound_center_from_bounds(bbmin, bbmax)
+    radius = get_sphere_radius(bbmax, center)
+    if sphere is not None and np.all(np.isfinite(sphere[0])) and sphere[1] < radius:
+        center, radius = Vector(sphere[0]), float(sphere[1])
+
+    if ExportCache.active:
+        ExportCache.spheres[key] = (center.copy(), radius)
+
+    return center, radius
+
+
 def get_local_pos(obj):
     return Vector(obj.parent.matrix_world.inverted() @ obj.matrix_world.translation)
 
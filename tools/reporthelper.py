@@ -0,0 +1,84 @@
+import os
+import json
+from .vertexcachehelper import get_acmr
+from .ddshelper import DDS_HEADER_SIZE, read_dds_info, get_dds_data_size
+
+REPORT_FILENAME = "sollumz_export_report.json"
+
+
+def get_texture_memory(filepath):
+    """Get the memory used by the pixels of every mip level of a texture, from its dds header when it can be read"""
+    info = read_dds_info(filepath)
+    size = get_dds_data_size(info) if info is not None else None
+    if size is not None:
+        return size
+
+    try:
+        return max(os.path.getsize(filepath) - DDS_HEADER_SIZE, 0)
+    except (OSError, TypeError):
+        return 0
+
+
+def geometry_cost_report(geometry, lod, model_index, geometry_index):
+    vertices = geometry.vertex_buffer.data
+    indices = geometry.index_buffer.data
+    stride = vertices.dtype.itemsize if len(vertices) > 0 else 0
+    return {
+        "lod": lod,
+        "model": model_index,
+        "geometry": geometry_index,
+        "shader_index": geometry.shader_index,
+        "vertices": len(vertices),
+        "triangles": len(indices) // 3,
+        "vertex_stride": stride,
+        "vertex_buffer_bytes": len(vertices) * stride,
+        "index_buffer_bytes": len(indices) * 2,
+        "acmr": round(get_acmr(indices), 3),
+        "bone_palette": len(geometry.bone_ids),
+    }
+
+
+def drawable_cost_report(drawable, filepath, texture_sources):
+    """Get the render cost of an exported drawable from the buffers built for it. texture_sources maps texture names to
+    the files they were exported from."""
+    geometries = []
+    lods = (("high", drawable.drawable_models_high), ("medium", drawable.drawable_models_med),
+            ("low", drawable.drawable_models_low), ("very_low", drawable.drawable_models_vlow))
+    for lod, models in lods:
+        for model_index, model in enumerate(models or []):
+            for geometry_index, geometry in enumerate(model.geometries):
+                geometries.append(geometry_cost_report(
+                    geometry, lod, model_index, geometry_index))
+
+    shaders = []
+    textures = []
+    if drawable.shader_group:
+        shaders = drawable.shader_group.shaders
+        textures = drawable.shader_group.texture_dictionary or []
+
+    return {
+        "name": drawable.name,
+        "file": os.path.basename(filepath),
+        "shaders": len(shaders),
+        "textures": len(textures),
+        "texture_memory_bytes": sum(get_texture_memory(texture_sources.get(texture.name)) for texture in textures),
+        "bones": len(drawable.skeleton.bones or []) if drawable.skeleton else 0,
+        "vertices": sum(g["vertices"] for g in geometries if g["lod"] == "high"),
+        "triangles": sum(g["triangles"] for g in geometries if g["lod"] == "high"),
+        "buffer_bytes": sum(g["vertex_buffer_bytes"] + g["index_buffer_bytes"] for g in geometries),
+        "geometries": geometries,
+    }
+
+
+def get_report_summary(report):
+    return (f"{report['name']}: {report['vertices']} vertices, {report['triangles']} triangles (high), "
+            f"{round(report['buffer_bytes'] / 1024, 1)} KB buffers, {report['shaders']} shaders, "
+            f"{report['textures']} textures ({round(report['texture_memory_bytes'] / 1024, 1)} KB), "
+            f"{report['bones']} bones")
+
+
+def write_cost_report(reports, merged_materials, filepath):
+    merged = [{"object": name, "material": material, "merged_into": merged_into}
+              for name, material, merged_into in merged_materials]
+    with open(filepath, "w") as f:
+        json.dump({"drawables": reports, "merged_materials": merged}, f, indent=4)
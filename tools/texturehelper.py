@@ -0,0 +1,118 @@
+import os
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_file_hash(filepath, chunk_size=1024 * 1024):
+    file_hash = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.digest()
+
+
+def is_same_file(src_stat, srcpath, dstpath):
+    """Check if dstpath already holds the same content as srcpath, comparing size, then mtime, then content hash"""
+    try:
+        dst_stat = os.stat(dstpath)
+    except FileNotFoundError:
+        return False
+
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if os.path.samestat(src_stat, dst_stat) or int(src_stat.st_mtime) == int(dst_stat.st_mtime):
+        return True
+
+    return get_file_hash(srcpath) == get_file_hash(dstpath)
+
+
+def is_same_filesystem(src_stat, dstpath):
+    try:
+        return src_stat.st_dev == os.stat(os.path.dirname(dstpath)).st_dev
+    except OSError:
+        return False
+
+
+class TextureCopier:
+    """Copies textures to the export folders on a thread pool, skipping the ones that are already up to date"""
+
+    def __init__(self, use_links=False, max_workers=4):
+        self.use_links = use_links
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = []
+        self.queued = set()
+        self.lock = threading.Lock()
+        self.bytes_copied = 0
+        self.bytes_skipped = 0
+        self.files_copied = 0
+        self.files_linked = 0
+        self.files_skipped = 0
+        self.errors = []
+
+    def copy(self, srcpath, dstpath):
+        """Queue a texture copy, returns immediately"""
+        dstpath = os.path.normpath(dstpath)
+        if dstpath in self.queued or os.path.normpath(srcpath) == dstpath:
+            return
+
+        self.queued.add(dstpath)
+        self.futures.append(self.executor.submit(
+            self.copy_file, srcpath, dstpath))
+
+    def copy_file(self, srcpath, dstpath):
+        try:
+            src_stat = os.stat(srcpath)
+            if is_same_file(src_stat, srcpath, dstpath):
+                with self.lock:
+                    self.bytes_skipped += src_stat.st_size
+                    self.files_skipped += 1
+                return
+
+            if self.use_links and is_same_filesystem(src_stat, dstpath):
+                try:
+                    if os.path.lexists(dstpath):
+                        os.remove(dstpath)
+                    os.link(srcpath, dstpath)
+                    with self.lock:
+                        self.bytes_skipped += src_stat.st_size
+                        self.files_linked += 1
+                    return
+                except OSError:
+                    # Filesystem doesn't support hardlinks, copy instead
+                    pass
+
+            # copy2 keeps the modification time so the next export can skip the file without hashing it
+            shutil.copy2(srcpath, dstpath)
+            with self.lock:
+                self.bytes_copied += src_stat.st_size
+                self.files_copied += 1
+        except OSError as e:
+            with self.lock:
+                self.errors.append(f"Failed to copy texture {srcpath}: {e}")
+
+    def wait(self):
+        """Wait for every queued copy to finish"""
+        for future in self.futures:
+            future.result()
+        self.futures.clear()
+
+    def shutdown(self):
+        self.wait()
+        self.executor.shutdown()
+
+    def get_summary(self):
+        summary = f"Textures: {self.files_copied} copied ({format_bytes(self.bytes_copied)})"
+        if self.files_linked > 0:
+            summary += f", {self.files_linked} linked"
+        summary += f", {self.files_skipped + self.files_linked} skipped ({format_bytes(self.bytes_skipped)})."
+        return summary
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{round(size, 1)} {unit}"
+        size /= 1024
+    return f"{round(size, 1)} GB"
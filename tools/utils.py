@@ -12,6 +12,15 @@ def get_list_item(list, index):
         return None
 
 
+def run_steps(steps):
+    """Exhaust a generator that yields progress labels and return its return value"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as e:
+            return e.value
+
+
 def flag_list_to_int(flag_list):
     flags = 0
     for i, enabled in enumerate(flag_list):
@@ -0,0 +1,160 @@
+import collections
+import numpy as np
+
+# Tom Forsyth's "Linear-Speed Vertex Cache Optimisation" scoring constants
+CACHE_SIZE = 32
+CACHE_DECAY_POWER = 1.5
+LAST_TRI_SCORE = 0.75
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+# Post-transform cache used to measure the average cache miss ratio
+ACMR_CACHE_SIZE = 16
+
+
+def get_cache_scores():
+    scores = []
+    for position in range(CACHE_SIZE):
+        if position < 3:
+            # The triangle that was just drawn, don't favour re-using it too much
+            scores.append(LAST_TRI_SCORE)
+        else:
+            scale = 1.0 / (CACHE_SIZE - 3)
+            scores.append((1.0 - (position - 3) * scale) ** CACHE_DECAY_POWER)
+    return scores
+
+
+def get_valence_scores(max_valence):
+    return [0.0] + [VALENCE_BOOST_SCALE * (valence ** -VALENCE_BOOST_POWER) for valence in range(1, max_valence + 1)]
+
+
+def get_acmr(indices, cache_size=ACMR_CACHE_SIZE):
+    """Get the average number of vertices transformed per triangle with a FIFO post-transform cache"""
+    triangle_count = len(indices) // 3
+    if triangle_count == 0:
+        return 0.0
+
+    # A full deque drops its oldest index on append, drop it from the set of cached indices first
+    cache = collections.deque(maxlen=cache_size)
+    cached = set()
+    misses = 0
+    for index in indices.tolist():
+        if index in cached:
+            continue
+        misses += 1
+        if len(cache) == cache_size:
+            cached.discard(cache[0])
+        cache.append(index)
+        cached.add(index)
+
+    return misses / triangle_count
+
+
+def optimize_triangle_order(indices, vertex_count):
+    """Reorder the triangles of a triangle list index buffer for post-transform vertex cache locality"""
+    triangles = indices.reshape(-1, 3).tolist()
+    triangle_count = len(triangles)
+    if triangle_count == 0:
+        return indices
+
+    # Triangles of each vertex in one flat array, vertex_triangles[vertex_starts[v]:vertex_starts[v] + live_counts[v]]
+    # are the triangles of v that weren't drawn yet
+    flat = indices.reshape(-1).astype(np.int64)
+    valences = np.bincount(flat, minlength=vertex_count)
+    vertex_starts = np.zeros(vertex_count, dtype=np.int64)
+    np.cumsum(valences[:-1], out=vertex_starts[1:])
+    vertex_triangles = (np.argsort(flat, kind="stable") // 3).tolist()
+    vertex_starts = vertex_starts.tolist()
+    live_counts = valences.tolist()
+
+    cache_scores = get_cache_scores()
+    valence_scores = get_valence_scores(max(live_counts))
+
+    def vertex_score(vertex):
+        valence = live_counts[vertex]
+        if valence == 0:
+            return -1.0
+        position = cache_positions[vertex]
+        score = cache_scores[position] if position >= 0 else 0.0
+        return score + valence_scores[valence]
+
+    cache_positions = [-1] * vertex_count
+    vertex_scores = [vertex_score(v) for v in range(vertex_count)]
+    triangle_scores = [sum(vertex_scores[v] for v in tri) for tri in triangles]
+    emitted = [False] * triangle_count
+
+    result = []
+    cache = []
+    best_tri = max(range(triangle_count), key=triangle_scores.__getitem__)
+    next_unemitted = 0
+
+    while best_tri != -1:
+        tri = triangles[best_tri]
+        result.extend(tri)
+        emitted[best_tri] = True
+
+        # Swap-remove the triangle from the live triangles of its vertices
+        for vertex in tri:
+            start = vertex_starts[vertex]
+            last = start + live_counts[vertex] - 1
+            position = start
+            while vertex_triangles[position] != best_tri:
+                position += 1
+            vertex_triangles[position] = vertex_triangles[last]
+            vertex_triangles[last] = best_tri
+            live_counts[vertex] -= 1
+
+        # Move the triangle's vertices to the front of the cache
+        new_cache = list(tri)
+        new_cache.extend(v for v in cache if v not in tri)
+        evicted = new_cache[CACHE_SIZE:]
+        cache = new_cache[:CACHE_SIZE]
+
+        for vertex in evicted:
+            cache_positions[vertex] = -1
+            vertex_scores[vertex] = vertex_score(vertex)
+        for position, vertex in enumerate(cache):
+            cache_positions[vertex] = position
+            vertex_scores[vertex] = vertex_score(vertex)
+
+        # Only triangles using a vertex in the cache changed score, pick the best one of them
+        best_tri = -1
+        best_score = -1.0
+        for vertex in cache:
+            start = vertex_starts[vertex]
+            for tri_index in vertex_triangles[start:start + live_counts[vertex]]:
+                score = sum(vertex_scores[v] for v in triangles[tri_index])
+                triangle_scores[tri_index] = score
+                if score > best_score:
+                    best_score = score
+                    best_tri = tri_index
+
+        if best_tri == -1:
+            # Cache has nothing left to draw, continue with the next triangle that wasn't drawn yet
+            while next_unemitted < triangle_count and emitted[next_unemitted]:
+                next_unemitted += 1
+            if next_unemitted < triangle_count:
+                best_tri = next_unemitted
+
+    return np.array(result, dtype=indices.dtype)
+
+
+def compact_vertices(vertices, indices):
+    """Keep only the vertices used by the index buffer, in the order they are first used. Returns the new vertices and
+    indices."""
+    _, first_use = np.unique(indices, return_index=True)
+    used = indices[np.sort(first_use)]
+    remap = np.zeros(len(vertices), dtype=indices.dtype)
+    remap[used] = np.arange(len(used), dtype=indices.dtype)
+
+    return vertices[used], remap[indices]
+
+
+def optimize_vertex_cache(vertices, indices):
+    """Optimize an indexed triangle list for the post-transform cache and vertex fetch. Returns the new vertices and
+    indices, and the ACMR before and after."""
+    acmr_before = get_acmr(indices)
+    indices = optimize_triangle_order(indices, len(vertices))
+    # Reorder vertices in the order they are first used for fetch locality
+    vertices, indices = compact_vertices(vertices, indices)
+
+    return vertices, indices, acmr_before, get_acmr(indices)
@@ -0,0 +1,68 @@
+import traceback
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from ..resources.codewalker_xml import indent
+
+
+class XmlWriter:
+    """Writes exported resources on a background thread while the next objects are extracted. The xml tree of a
+    resource is built on the calling thread, so the writer never touches blender data, and only the indenting and the
+    file write are queued. Both hold the GIL for most of their work, so this overlaps disk IO with the extraction of the
+    next object rather than serialising in parallel, and a single thread keeps the files in export order."""
+    executor = None
+    futures = []
+
+    @staticmethod
+    def begin():
+        XmlWriter.futures.clear()
+        XmlWriter.executor = ThreadPoolExecutor(max_workers=1)
+
+    @staticmethod
+    def write(resource, filepath):
+        """Write resource to filepath, on the writer thread between begin and finish"""
+        if XmlWriter.executor is None:
+            resource.write_xml(filepath)
+            return
+
+        element = resource.to_xml()
+        XmlWriter.futures.append(XmlWriter.executor.submit(
+            write_element, element, filepath))
+
+    @staticmethod
+    def finish():
+        """Wait for every queued file to be written, returns a list of (filepath, error message) for the files that
+        failed"""
+        executor = XmlWriter.executor
+        XmlWriter.executor = None
+        if executor is None:
+            return []
+
+        try:
+            errors = [future.result() for future in XmlWriter.futures]
+        finally:
+            executor.shutdown()
+            XmlWriter.futures.clear()
+
+        return [error for error in errors if error]
+
+    @staticmethod
+    def cancel():
+        executor = XmlWriter.executor
+        XmlWriter.executor = None
+        if executor is None:
+            return
+
+        for future in XmlWriter.futures:
+            future.cancel()
+        executor.shutdown()
+        XmlWriter.futures.clear()
+
+
+def write_element(element, filepath):
+    try:
+        indent(element)
+        ET.ElementTree(element).write(
+            filepath, encoding="UTF-8", xml_declaration=True)
+    except Exception:
+        return filepath, f"Error writing: {filepath} \n {traceback.format_exc()}"
+    return None
@@ -2,18 +2,19 @@ import bpy
 import os
 from ..sollumz_helper import has_embedded_textures, has_collision
 from ..resources.ytyp import *
-from ..tools.meshhelper import get_bound_extents, get_bound_center, get_sphere_radius
+from ..tools.meshhelper import get_bound_extents, get_bound_sphere
 from ..sollumz_properties import SollumType
 
 
-def base_archetype_from_object(obj):
+def base_archetype_from_object(obj, export_context=None):
     arch = BaseArchetype()
     arch.lod_dist = 60
     arch.flags = 32
     arch.special_attribute = 0
     arch.hd_texture_dist = 60
     arch.name = obj.name
-    arch.texture_dictionary = obj.name if has_embedded_textures(obj) else ""
+    arch.texture_dictionary = obj.name if has_embedded_textures(
+        obj, export_context) else ""
     arch.clip_dictionary = ""
     drawable_dictionary = ""
     if obj.parent:
@@ -24,8 +25,7 @@ def base_archetype_from_object(obj):
     bbmin, bbmax = get_bound_extents(obj, world=False)
     arch.bb_min = bbmin
     arch.bb_max = bbmax
-    arch.bs_center = get_bound_center(obj, world=False)
-    arch.bs_radius = get_sphere_radius(bbmax, arch.bs_center)
+    arch.bs_center, arch.bs_radius = get_bound_sphere(obj, world=False)
     arch.asset_name = obj.name
     if obj.sollum_type == SollumType.FRAGMENT:
         arch.asset_type = "ASSET_TYPE_FRAGMENT"
@@ -36,10 +36,11 @@ def base_archetype_from_object(obj):
     return arch
 
 
-def ytyp_from_objects(objs):
+def ytyp_from_objects(objs, export_context=None):
     ytyp = CMapTypes()
     ytyp.name = os.path.basename(
         bpy.data.filepath).replace(".blend", "") if bpy.data.filepath is not "" else "untitled"
     for obj in objs:
-        ytyp.archetypes.append(base_archetype_from_object(obj))
+        ytyp.archetypes.append(
+            base_archetype_from_object(obj, export_context))
     return ytyp
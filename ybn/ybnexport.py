@@ -3,6 +3,7 @@ from ..resources.bound import *
 from ..sollumz_properties import BOUND_SHAPE_TYPES, MaterialType, SollumType
 from ..tools.meshhelper import *
 from ..tools.utils import *
+from ..tools.xmlhelper import XmlWriter
 
 
 class NoGeometryError(Exception):
@@ -148,7 +149,7 @@ def geometry_from_object(obj, sollum_type=SollumType.BOUND_GEOMETRYBVH, export_s
         geometry.composite_transform[3][0] = 0
         geometry.composite_transform[3][1] = 0
         geometry.composite_transform[3][2] = 0
-        geometry.geometry_center = obj.location
+        geometry.geometry_center = obj.location.copy()
 
     # Ensure object has geometry
     found = False
@@ -385,4 +386,4 @@ def boundfile_from_object(obj, export_settings):
 
 
 def export_ybn(obj, filepath, export_settings):
-    boundfile_from_object(obj, export_settings).write_xml(filepath)
+    XmlWriter.write(boundfile_from_object(obj, export_settings), filepath)
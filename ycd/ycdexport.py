@@ -7,6 +7,8 @@ from ..sollumz_properties import SollumType
 from ..tools.jenkhash import Generate
 from ..tools.blenderhelper import build_name_bone_map, build_bone_map, get_armature_obj
 from ..tools.animationhelper import *
+from ..tools.utils import run_steps
+from ..tools.xmlhelper import XmlWriter
 
 def get_name(item):
     return item.name.split('.')[0]
@@ -342,7 +344,8 @@ def clip_from_object(clip_obj):
     return clip
 
 
-def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None):
+def clip_dictionary_from_object_steps(exportop, obj, exportpath, export_settings=None):
+    """Generator version of clip_dictionary_from_object, yields the name of each animation as it is exported"""
     clip_dictionary = ClipsDictionary()
 
     armature = obj.clip_dict_properties.armature
@@ -371,6 +374,7 @@ def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None)
         animation = animation_from_object(animation_obj, bones_name_map, bones_map, is_ped_animation)
 
         clip_dictionary.animations.append(animation)
+        yield animation_obj.name
 
     for clip_obj in clips_obj.children:
         clip = clip_from_object(clip_obj)
@@ -380,5 +384,16 @@ def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None)
     return clip_dictionary
 
 
+def clip_dictionary_from_object(exportop, obj, exportpath, export_settings=None):
+    return run_steps(clip_dictionary_from_object_steps(exportop, obj, exportpath, export_settings))
+
+
+def export_ycd_steps(exportop, obj, filepath, export_settings):
+    """Generator version of export_ycd, yields the name of each animation as it is exported"""
+    clip_dictionary = yield from clip_dictionary_from_object_steps(
+        exportop, obj, filepath, export_settings)
+    XmlWriter.write(clip_dictionary, filepath)
+
+
 def export_ycd(exportop, obj, filepath, export_settings):
-    clip_dictionary_from_object(exportop, obj, filepath, export_settings).write_xml(filepath)
+    run_steps(export_ycd_steps(exportop, obj, filepath, export_settings))
@@ -5,7 +5,7 @@ from ..resources.clipsdictionary import YCD
 from ..sollumz_properties import SOLLUMZ_UI_NAMES, SollumType
 from ..tools.blenderhelper import build_bone_map, get_armature_obj
 from ..tools.animationhelper import is_ped_bone_tag
-from ..tools.utils import list_index_exists
+from ..tools.utils import list_index_exists, run_steps
 
 def create_anim_obj(type):
     anim_obj = bpy.data.objects.new(SOLLUMZ_UI_NAMES[type], None)
@@ -360,7 +360,8 @@ def create_clip_dictionary_template(name, armature):
     return clip_dictionary_obj, clips_obj, animations_obj
 
 
-def clip_dictionary_to_obj(clip_dictionary, name, armature, armature_obj):
+def clip_dictionary_to_obj_steps(clip_dictionary, name, armature, armature_obj):
+    """Generator version of clip_dictionary_to_obj, yields the hash of each animation as it is imported"""
     clip_dictionary_obj, clips_obj, animations_obj = create_clip_dictionary_template(name, armature)
 
     is_ped_animation = False
@@ -380,13 +381,20 @@ def clip_dictionary_to_obj(clip_dictionary, name, armature, armature_obj):
         animation_obj.parent = animations_obj
 
         animations_obj_map[animation.hash] = animation_obj
+        yield animation.hash
 
     for clip in clip_dictionary.clips:
         clip_obj = clip_to_obj(clip, animations_map, animations_obj_map)
         clip_obj.parent = clips_obj
 
 
-def import_ycd(export_op, filepath, import_settings):
+def clip_dictionary_to_obj(clip_dictionary, name, armature, armature_obj):
+    run_steps(clip_dictionary_to_obj_steps(
+        clip_dictionary, name, armature, armature_obj))
+
+
+def import_ycd_steps(export_op, filepath, import_settings):
+    """Generator version of import_ycd, yields the hash of each animation as it is imported"""
     if import_settings.selected_armature == -1 or not list_index_exists(bpy.data.armatures, import_settings.selected_armature):
         export_op.warning('Selected target skeleton not found.')
         return
@@ -396,7 +404,7 @@ def import_ycd(export_op, filepath, import_settings):
 
     ycr_xml = YCD.from_xml_file(filepath)
 
-    clip_dictionary_to_obj(
+    yield from clip_dictionary_to_obj_steps(
         ycr_xml,
         os.path.basename(
             filepath.replace(YCD.file_extension, '')
@@ -404,3 +412,7 @@ def import_ycd(export_op, filepath, import_settings):
         armature,
         armature_obj
     )
+
+
+def import_ycd(export_op, filepath, import_settings):
+    run_steps(import_ycd_steps(export_op, filepath, import_settings))
@@ -1,7 +1,8 @@
 from ..resources.drawable import *
 from ..tools.meshhelper import *
 from ..tools.utils import *
-from ..ydr.ydrexport import drawable_from_object
+from ..tools.xmlhelper import XmlWriter
+from ..ydr.ydrexport import drawable_from_object, get_skeleton_table, is_skeleton_needed
 from ..tools import jenkhash
 from ..sollumz_properties import SollumType
 
@@ -10,29 +11,65 @@ def get_hash(item):
     return jenkhash.Generate(item.name.split(".")[0])
 
 
-def drawable_dict_from_object(exportop, obj, filepath, export_settings):
+def get_armature_modifier_object(obj):
+    """Get the armature object the geometries of obj are deformed by, None if there is none"""
+    for child in get_children_recursive(obj):
+        for modifier in child.modifiers:
+            if modifier.type == "ARMATURE" and modifier.object is not None and modifier.object.type == "ARMATURE":
+                if len(modifier.object.pose.bones) > 0:
+                    return modifier.object
+    return None
+
+
+def drawable_dict_from_object_steps(exportop, obj, filepath, export_settings):
+    """Generator version of drawable_dict_from_object, yields the name of each drawable as it is exported"""
 
     drawable_dict = DrawableDictionary()
+    export_context = getattr(exportop, "export_context", None)
 
     bones = None
+    armature_obj = None
     for child in obj.children:
         if child.sollum_type == SollumType.DRAWABLE and child.type == 'ARMATURE' and len(child.pose.bones) > 0:
             bones = child.pose.bones
+            # Bone tables are built once and shared by every drawable using the armature
+            get_skeleton_table(child, export_context)
             break
 
+    if bones is None:
+        # Drawables imported with an external skeleton are bound to an armature outside of the ydd, their skeleton is
+        # read from it
+        armature_obj = get_armature_modifier_object(obj)
+        if armature_obj is not None:
+            bones = armature_obj.pose.bones
+            get_skeleton_table(armature_obj, export_context)
+
     for child in obj.children:
         if child.sollum_type == SollumType.DRAWABLE:
+            # Every drawable copies its embedded textures to the same folder, textures they share are copied once
             drawable = drawable_from_object(
-                exportop, child, filepath, bones, None, export_settings)
-            if export_settings.exclude_skeleton:
+                exportop, child, filepath, bones, None, export_settings, foldername=obj.name,
+                write_skeleton=not export_settings.exclude_skeleton, armature_obj=armature_obj)
+            if drawable.skeleton is not None and not is_skeleton_needed(drawable):
                 drawable.skeleton = None
             drawable_dict.append(drawable)
+            yield child.name
 
     drawable_dict.sort(key=get_hash)
 
     return drawable_dict
 
 
+def drawable_dict_from_object(exportop, obj, filepath, export_settings):
+    return run_steps(drawable_dict_from_object_steps(exportop, obj, filepath, export_settings))
+
+
+def export_ydd_steps(exportop, obj, filepath, export_settings):
+    """Generator version of export_ydd, yields the name of each drawable as it is exported"""
+    drawable_dict = yield from drawable_dict_from_object_steps(
+        exportop, obj, filepath, export_settings)
+    XmlWriter.write(drawable_dict, filepath)
+
+
 def export_ydd(exportop, obj, filepath, export_settings):
-    drawable_dict_from_object(exportop, obj, filepath,
-                              export_settings).write_xml(filepath)
+    run_steps(export_ydd_steps(exportop, obj, filepath, export_settings))
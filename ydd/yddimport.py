@@ -2,13 +2,46 @@ import bpy
 import os
 from ..resources.drawable import *
 from ..resources.fragment import YFT
-from ..ydr.ydrimport import drawable_to_obj
+from ..ydr.ydrimport import drawable_to_obj, get_excluded_lod_tags, skeleton_to_obj
 from ..tools.drawablehelper import join_drawable_geometries
 from ..sollumz_properties import SollumType
 from ..sollumz_helper import find_fragment_file
+from ..tools.utils import run_steps
 
 
-def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
+# Skeletons read from external fragment files, keyed by (filepath, modification time)
+external_skeletons = {}
+# Name of the armature object created for each external skeleton, keyed like external_skeletons
+external_armatures = {}
+
+
+def get_external_skeleton(filepath):
+    """Get the skeleton of a fragment file, only parsed again if the file changed. Returns the cache key and the
+    skeleton."""
+    key = (filepath, os.stat(filepath).st_mtime_ns)
+    if key not in external_skeletons:
+        external_skeletons[key] = YFT.skeleton_from_xml_file(filepath)
+    return key, external_skeletons[key]
+
+
+def get_external_armature(key, skeleton):
+    """Get the armature object of an external skeleton, created by the first ydd using it and shared by the others"""
+    obj = bpy.data.objects.get(external_armatures.get(key, ""))
+    if obj is not None and obj.type == "ARMATURE":
+        return obj
+
+    name = os.path.basename(key[0])[:-len(YFT.file_extension)]
+    obj = bpy.data.objects.new(name, bpy.data.armatures.new(name + ".skel"))
+    bpy.context.collection.objects.link(obj)
+    skeleton_to_obj(skeleton, obj)
+    external_armatures[key] = obj.name
+
+    return obj
+
+
+def drawable_dict_to_obj_steps(drawable_dict, filepath, import_settings, bones=None, armature_obj=None):
+    """Generator version of drawable_dict_to_obj, yields the name of each drawable as it is imported. bones and
+    armature_obj are an external skeleton and the armature to bind every drawable to."""
 
     name = os.path.basename(filepath)[:-8]
     vmodels = []
@@ -22,9 +55,12 @@ def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
             drawable_with_skel = drawable
             break
 
+    if bones is None and drawable_with_skel is not None:
+        bones = drawable_with_skel.skeleton.bones
+
     for drawable in drawable_dict:
         drawable_obj = drawable_to_obj(
-            drawable, filepath, drawable.name, bones_override=drawable_with_skel.skeleton.bones if drawable_with_skel else None, import_settings=import_settings)
+            drawable, filepath, drawable.name, bones_override=bones, import_settings=import_settings)
         if (armature_with_skel_obj is None and drawable_with_skel is not None and len(drawable.skeleton.bones) > 0):
             armature_with_skel_obj = drawable_obj
 
@@ -37,6 +73,7 @@ def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
                 mod_objs.append(geo)
 
         vmodels.append(drawable_obj)
+        yield drawable.name
 
     dict_obj = bpy.data.objects.new(name, None)
     dict_obj.sollum_type = SollumType.DRAWABLE_DICTIONARY
@@ -45,32 +82,52 @@ def drawable_dict_to_obj(drawable_dict, filepath, import_settings):
     for vmodel in vmodels:
         vmodel.parent = dict_obj
 
-    if armature_with_skel_obj is not None:
+    if armature_obj is None:
+        armature_obj = armature_with_skel_obj
+
+    if armature_obj is not None:
         for obj in mod_objs:
             mod = obj.modifiers.get("Armature")
             if mod is None:
                 continue
-            mod.object = armature_with_skel_obj
+            mod.object = armature_obj
 
     return dict_obj
 
 
-def import_ydd(export_op, filepath, import_settings):
-    ydd_xml = YDD.from_xml_file(filepath)
+def drawable_dict_to_obj(drawable_dict, filepath, import_settings, bones=None, armature_obj=None):
+    return run_steps(drawable_dict_to_obj_steps(drawable_dict, filepath, import_settings, bones, armature_obj))
+
 
+def import_ydd_steps(export_op, filepath, import_settings):
+    """Generator version of import_ydd, yields the name of each drawable as it is imported"""
+    ydd_xml = YDD.from_xml_file(
+        filepath, get_excluded_lod_tags(import_settings))
+
+    bones = None
+    armature_obj = None
     if import_settings.import_ext_skeleton:
         skel_filepath = find_fragment_file(filepath)
         if skel_filepath:
-            yft = YFT.from_xml_file(skel_filepath)
-            for drawable in ydd_xml:
-                drawable.skeleton = yft.drawable.skeleton
+            key, skeleton = get_external_skeleton(skel_filepath)
+            if skeleton is not None and len(skeleton.bones) > 0:
+                # Every ydd using the skeleton is bound to the same armature
+                bones = skeleton.bones
+                armature_obj = get_external_armature(key, skeleton)
+            else:
+                export_op.warning(
+                    f"No skeleton found in external skeleton file {skel_filepath}.")
         else:
             export_op.warning("No external skeleton file found.")
 
-    drawable_dict = drawable_dict_to_obj(ydd_xml, filepath, import_settings)
+    drawable_dict = yield from drawable_dict_to_obj_steps(ydd_xml, filepath, import_settings, bones, armature_obj)
     if import_settings.join_geometries:
         for child in drawable_dict.children:
             if child.sollum_type == SollumType.DRAWABLE:
                 for grandchild in child.children:
                     if grandchild.sollum_type == SollumType.DRAWABLE_MODEL:
                         join_drawable_geometries(grandchild)
+
+
+def import_ydd(export_op, filepath, import_settings):
+    run_steps(import_ydd_steps(export_op, filepath, import_settings))
@@ -113,38 +113,60 @@ def get_detail_extra_sampler(mat):  # move to blenderhelper.py?
 
 
 def create_tinted_texture_from_image(img):  # move to blenderhelper.py?
-    bpy.ops.texture.new()
-    txt = bpy.data.textures[len(bpy.data.textures) - 1]
+    txt = bpy.data.textures.new(
+        img.name + "_texture" if img else "palette_texture", type="IMAGE")
     if img is not None:
         txt.image = img
     txt.use_interpolation = False
     txt.use_mipmap = False
     txt.use_alpha = False
-    txt.name = img.name + "_texture" if img else "palette_texture"
     return txt
 
 
-def create_tinted_shader_graph(obj):  # move to blenderhelper.py?
-    mat = obj.data.materials[0]
-    tint_img = get_tinted_sampler(mat)
-    if mat.shader_properties.filename in ShaderManager.tint_flag_2 or tint_img == None:  # check here or?
-        return
+# Tint geometry node groups keyed by palette image name, shared by every object using that palette
+tint_geometry_cache = {}
+
 
-    bpy.ops.object.select_all(action='DESELECT')
-    bpy.context.view_layer.objects.active = obj
-    obj.select_set(True)
-    bpy.ops.node.new_geometry_nodes_modifier()
-    tnt_ng = create_tinted_geometry_graph()
-    geom = obj.modifiers["GeometryNodes"]
-    geom.node_group = tnt_ng
-    txt = create_tinted_texture_from_image(tint_img)
-    txt_node = geom.node_group.nodes["Attribute Sample Texture"]
+def is_cached_tint_geometry_valid(img, gnt, txt):
+    try:
+        return bpy.data.node_groups.get(gnt.name) == gnt and bpy.data.textures.get(txt.name) == txt and txt.image == img
+    except ReferenceError:
+        # Datablocks were removed or invalidated by an undo
+        return False
+
+
+def get_tinted_geometry_graph(img):
+    cached = tint_geometry_cache.get(img.name)
+    if cached is not None and is_cached_tint_geometry_valid(img, *cached):
+        return cached[0]
+
+    gnt = create_tinted_geometry_graph()
+    txt = create_tinted_texture_from_image(img)
+    txt_node = gnt.nodes["Attribute Sample Texture"]
 
     if USE_LEGACY:
         txt_node.texture = txt
     else:
         txt_node.inputs[1].default_value = txt
 
+    tint_geometry_cache[img.name] = (gnt, txt)
+
+    return gnt
+
+
+def create_tinted_shader_graph(obj):  # move to blenderhelper.py?
+    mat = obj.data.materials[0]
+    filename = mat.shader_properties.filename
+    if filename not in ShaderManager.palette_shaders or filename in ShaderManager.tint_flag_2:
+        return
+
+    tint_img = get_tinted_sampler(mat)
+    if tint_img == None:
+        return
+
+    geom = obj.modifiers.new("GeometryNodes", "NODES")
+    geom.node_group = get_tinted_geometry_graph(tint_img)
+
     obj.data.vertex_colors.new(name="TintColor")
 
 
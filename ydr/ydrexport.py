@@ -1,9 +1,9 @@
 import os
-import shutil
 import collections
 import bmesh
 import bpy
 import zlib
+import numpy as np
 from ..resources.fragment import FragmentDrawable
 from ..resources.drawable import *
 from ..resources.shader import ShaderManager
@@ -12,9 +12,14 @@ from ..tools.meshhelper import *
 from ..tools.utils import *
 from ..tools.blenderhelper import *
 from ..tools.drawablehelper import *
+from ..tools.texturehelper import TextureCopier, get_file_hash
+from ..tools.xmlhelper import XmlWriter
+from ..tools.vertexcachehelper import optimize_vertex_cache, compact_vertices
+from ..tools.lodhelper import LOD_RATIOS, MIN_REDUCTION, get_decimated_geometry, get_lod_distances
+from ..tools.ddshelper import read_dds_info
 from ..sollumz_properties import BOUND_TYPES, SOLLUMZ_UI_NAMES, LightType, MaterialType, LODLevel, SollumType
 from ..ybn.ybnexport import bound_from_object, composite_from_object
-from math import degrees, pi
+from math import degrees, pi, sin
 
 
 def get_used_materials(obj):
@@ -29,10 +34,17 @@ def get_used_materials(obj):
     return materials
 
 
-def get_shaders_from_blender(materials):
+def get_shaders_from_blender(materials, export_context=None):
     shaders = []
 
     for material in materials:
+        # Drawables sharing materials, like the drawables of a ydd, share their shaders
+        shader = export_context.shader_items.get(
+            material.as_pointer()) if export_context else None
+        if shader is not None:
+            shaders.append(shader)
+            continue
+
         shader = ShaderItem()
         # Maybe make this a property?
         shader.name = material.shader_properties.name
@@ -70,6 +82,8 @@ def get_shaders_from_blender(materials):
 
                     shader.parameters.append(param)
 
+        if export_context:
+            export_context.shader_items[material.as_pointer()] = shader
         shaders.append(shader)
 
     return shaders
@@ -77,10 +91,21 @@ def get_shaders_from_blender(materials):
 
 def texture_item_from_node(n):
     texture_item = TextureItem()
+    texture_item.format = SOLLUMZ_UI_NAMES[n.texture_properties.format]
+    texture_item.miplevels = 0
     if n.image:
         texture_item.name = n.image.name.split('.')[0]
-        texture_item.width = n.image.size[0]
-        texture_item.height = n.image.size[1]
+        # Read the header of dds files instead of having blender load the whole image for its size
+        info = read_dds_info(bpy.path.abspath(n.image.filepath))
+        if info is not None:
+            texture_item.width = info.width
+            texture_item.height = info.height
+            texture_item.miplevels = info.mip_levels
+            if info.format is not None:
+                texture_item.format = info.format
+        else:
+            texture_item.width = n.image.size[0]
+            texture_item.height = n.image.size[1]
     else:
         texture_item.name = "none"
         texture_item.width = 0
@@ -88,8 +113,6 @@ def texture_item_from_node(n):
 
     texture_item.usage = SOLLUMZ_UI_NAMES[n.texture_properties.usage]
     texture_item.extra_flags = n.texture_properties.extra_flags
-    texture_item.format = SOLLUMZ_UI_NAMES[n.texture_properties.format]
-    texture_item.miplevels = 0
     texture_item.filename = texture_item.name + ".dds"
     # texture_item.unk32 = 0
     for prop in dir(n.texture_flags):
@@ -100,10 +123,60 @@ def texture_item_from_node(n):
     return texture_item
 
 
-def texture_dictionary_from_materials(foldername, materials, exportpath):
+def get_texture_content_key(filepath, export_context=None):
+    """Get a key identifying the content of a texture file, files with the same key have the same content. Files that
+    can't be read are keyed by their path."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return filepath
+
+    signature = (os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns)
+    key = export_context.texture_content_keys.get(
+        signature) if export_context else None
+    if key is None:
+        # The same file reached through another path or a copy of it shares the key of the first one hashed
+        key = (stat.st_size, get_file_hash(filepath))
+        if export_context:
+            export_context.texture_content_keys[signature] = key
+    return key
+
+
+def queue_texture_copy(texture_copier, srcpath, dstpath, export_context=None):
+    """Copy srcpath to dstpath unless a texture with the same content was already copied there during the export.
+    Returns a message if a different texture was already copied there."""
+    if export_context is None:
+        texture_copier.copy(srcpath, dstpath)
+        return None
+
+    export_context.exported_textures.append(dstpath)
+    copied = export_context.copied_textures.get(dstpath)
+    if copied is None:
+        export_context.copied_textures[dstpath] = srcpath
+        texture_copier.copy(srcpath, dstpath)
+        return None
+
+    if get_texture_content_key(copied, export_context) == get_texture_content_key(srcpath, export_context):
+        return None
+
+    return f"Texture {srcpath} has the same name as {copied} in {os.path.dirname(dstpath)} but a different content, it will not be copied."
+
+
+def texture_dictionary_from_materials(foldername, materials, exportpath, texture_copier=None, texture_sources=None,
+                                      export_context=None):
+    """Get the embedded texture dictionary of materials and queue the copy of its textures to foldername. texture_sources
+    is filled with the source file of each texture of the dictionary, keyed by texture name."""
+    # Without a copier from the export operator, copy the textures before returning
+    own_copier = texture_copier is None
+    if own_copier:
+        texture_copier = TextureCopier()
+
     texture_dictionary = []
     messages = []
 
+    if texture_sources is None:
+        texture_sources = {}
+
     has_td = False
 
     t_names = []
@@ -114,7 +187,15 @@ def texture_dictionary_from_materials(foldername, materials, exportpath):
                 if(n.texture_properties.embedded == True):
                     has_td = True
                     texture_item = texture_item_from_node(n)
+                    txtpath = bpy.path.abspath(
+                        n.image.filepath) if n.image else None
                     if texture_item.name in t_names:
+                        # Shaders reference textures by name, only one texture of the dictionary can have it
+                        source = texture_sources.get(texture_item.name)
+                        if txtpath and source and get_texture_content_key(
+                                source, export_context) != get_texture_content_key(txtpath, export_context):
+                            messages.append(
+                                f"Texture {txtpath} has the same name as {source} in {foldername} but a different content, it will not be exported.")
                         continue
                     else:
                         t_names.append(texture_item.name)
@@ -122,15 +203,16 @@ def texture_dictionary_from_materials(foldername, materials, exportpath):
 
                     if n.image:
                         folderpath = os.path.join(exportpath, foldername)
-                        txtpath = bpy.path.abspath(n.image.filepath)
+                        texture_sources[texture_item.name] = txtpath
                         if os.path.isfile(txtpath):
                             if(os.path.isdir(folderpath) == False):
                                 os.mkdir(folderpath)
-                            dstpath = folderpath + "\\" + \
-                                os.path.basename(txtpath)
-                            # check if paths are the same because if they are no need to copy
-                            if txtpath != dstpath:
-                                shutil.copyfile(txtpath, dstpath)
+                            dstpath = os.path.join(
+                                folderpath, os.path.basename(txtpath))
+                            message = queue_texture_copy(
+                                texture_copier, txtpath, dstpath, export_context)
+                            if message:
+                                messages.append(message)
                         else:
                             messages.append(
                                 f"Missing Embedded Texture: {txtpath} please supply texture! The texture will not be copied to the texture folder until entered!")
@@ -138,150 +220,275 @@ def texture_dictionary_from_materials(foldername, materials, exportpath):
                         messages.append(
                             f"Material: {mat.name} is missing the {n.name} texture and will not be exported.")
 
+    if own_copier:
+        texture_copier.shutdown()
+        messages += texture_copier.errors
+
     if(has_td):
         return texture_dictionary, messages
     else:
         return None, []
 
 
-def get_blended_verts(mesh, vertex_groups, bones=None):
-    bone_index_map = {}
-    if(bones != None):
-        for i in range(len(bones)):
-            bone_index_map[bones[i].name] = i
-    else:
-        for i in range(256):
-            bone_index_map[f"UNKNOWN_BONE.{i}"] = i
-
-    blend_weights = []
-    blend_indices = []
-    for v in mesh.vertices:
-        if len(v.groups) > 0:
-            bw = [0] * 4
-            bi = [0] * 4
-            valid_weights = 0
-            total_weights = 0
-            max_weights = 0
-            max_weights_index = -1
-
-            for element in v.groups:
-                if element.group >= len(vertex_groups):
-                    continue
-
-                vertex_group = vertex_groups[element.group]
-                vg_name = vertex_group.name if bones else vertex_group.name[:-4]
-                bone_index = bone_index_map.get(vg_name, -1)
-                # 1/255 = 0.0039 the minimal weight for one vertex group
-                weight = round(element.weight * 255)
-                if (vertex_group.lock_weight == False and bone_index != -1 and weight > 0 and valid_weights < 4):
-                    bw[valid_weights] = weight
-                    bi[valid_weights] = bone_index
-                    if (max_weights < weight):
-                        max_weights_index = valid_weights
-                        max_weights = weight
-                    valid_weights += 1
-                    total_weights += weight
-
-            # weights normalization
-            if valid_weights > 0 and max_weights_index != -1:
-                bw[max_weights_index] = bw[max_weights_index] + \
-                    (255 - total_weights)
-
-            f = ((x, y) for x, y in zip(bw, bi))
-            sorted_f = sorted(f, key=lambda x: x[0])
-            bi = [i[1] for i in sorted_f]
-            bw.sort()
-
-            bw.append(bw.pop(0))
-            bi.append(bi.pop(0))
-
-            blend_weights.append(bw)
-            blend_indices.append(bi)
+# Maximum number of vertices a geometry can have, its index buffer is 16-bit
+MAX_GEOMETRY_VERTICES = 65535
+# Maximum number of bones in the palette of a skinned geometry, blend indices are 8-bit
+MAX_GEOMETRY_BONES = 255
+
+class ExportContext:
+    """State shared by everything exported in one run of the export operator, data computed once per datablock and
+    the results reported when the export ends. The operator creates one per run and passes it down, exporting without
+    one computes everything every time."""
+
+    def __init__(self):
+        # Bone name to bone index maps, keyed by armature pointer
+        self.bone_index_maps = {}
+        # Bone tables of each armature and the skeleton unknowns hashed from them, keyed by armature pointer
+        self.skeleton_tables = {}
+        self.skeleton_unknowns = {}
+        # Shader of each material and its shader signature, keyed by material pointer
+        self.shader_items = {}
+        self.shader_signatures = {}
+        # (object name, material name, name of the material it was merged into) of every merged material
+        self.merged_materials = []
+        # Whether each exported object has an embedded texture dictionary, keyed by object name
+        self.embedded_textures = {}
+        # (geometry name, ACMR before, ACMR after) of every geometry optimized for the vertex cache
+        self.vertex_cache_stats = []
+        # Source file of every texture copied to a texture folder, keyed by destination file
+        self.copied_textures = {}
+        # (size, content hash) of every texture file compared, keyed by (resolved path, size, modification time)
+        self.texture_content_keys = {}
+        # Destination file of every texture the exported objects depend on, in the order they were queued
+        self.exported_textures = []
+        # (drawable, export path, source file of each embedded texture keyed by name) of every exported drawable to
+        # report the render cost of, when enabled in the export settings
+        self.reported_drawables = []
+
+
+def get_bone_index_map(bones=None, export_context=None):
+    key = bones.id_data.as_pointer() if bones is not None else None
+    bone_index_map = export_context.bone_index_maps.get(
+        key) if export_context else None
+
+    if bone_index_map is None or (bones is not None and len(bone_index_map) != len(bones)):
+        if bones is not None:
+            bone_index_map = {bone.name: i for i, bone in enumerate(bones)}
         else:
-            blend_weights.append([0, 0, 0, 0])
-            blend_indices.append([0, 0, 0, 0])
+            bone_index_map = {f"UNKNOWN_BONE.{i}": i for i in range(256)}
+        if export_context:
+            export_context.bone_index_maps[key] = bone_index_map
+
+    return bone_index_map
+
+
+def get_blended_verts(mesh, vertex_groups, bones=None, export_context=None):
+    """Get the 8-bit blend weights and indices of every vertex as two (vertex count, 4) arrays"""
+    bone_index_map = get_bone_index_map(bones, export_context)
+
+    # Bone index of each vertex group, -1 for groups that don't drive a bone
+    group_bones = np.array([-1 if vertex_group.lock_weight else
+                            bone_index_map.get(vertex_group.name if bones else vertex_group.name[:-4], -1)
+                            for vertex_group in vertex_groups] + [-1], dtype=np.int32)
+
+    # Flatten every vertex's groups into one sparse (vertex x group) list, in CSR order
+    group_counts = np.array([len(v.groups) for v in mesh.vertices], dtype=np.int32)
+    elements = np.array([(element.group, element.weight) for v in mesh.vertices for element in v.groups],
+                        dtype=np.float64).reshape(-1, 2)
+    rows = np.repeat(np.arange(len(group_counts)), group_counts)
+    groups = np.minimum(elements[:, 0].astype(np.int32), len(vertex_groups))
+    # 1/255 = 0.0039 the minimal weight for one vertex group
+    weights = np.round(elements[:, 1] * 255).astype(np.int32)
+    bone_indices = group_bones[groups]
+
+    valid = (bone_indices != -1) & (weights > 0)
+    rows, weights, bone_indices = rows[valid], weights[valid], bone_indices[valid]
+
+    # Keep the 4 heaviest influences of each vertex, ties keep their vertex group order
+    order = np.lexsort((np.arange(len(rows)), -weights, rows))
+    rows, weights, bone_indices = rows[order], weights[order], bone_indices[order]
+    row_starts = np.searchsorted(rows, rows, side="left")
+    ranks = np.arange(len(rows)) - row_starts
+    top = ranks < 4
+
+    blend_weights = np.zeros((len(group_counts), 4), dtype=np.int32)
+    blend_indices = np.zeros((len(group_counts), 4), dtype=np.int32)
+    blend_weights[rows[top], ranks[top]] = weights[top]
+    blend_indices[rows[top], ranks[top]] = bone_indices[top]
+
+    # weights normalization, the heaviest influence takes the residual up to 255. Influences summing past 255 are
+    # scaled down first so the heaviest one can't go negative, vertices without any influence stay unweighted
+    totals = blend_weights.sum(axis=1)
+    weighted = totals > 0
+    overflow = totals > 255
+    blend_weights[overflow] = np.round(
+        blend_weights[overflow] * 255 / totals[overflow, None]).astype(np.int32)
+    blend_weights[weighted, 0] += 255 - blend_weights[weighted].sum(axis=1)
+    blend_weights = np.clip(blend_weights, 0, 255)
+
+    # Sort ascending and move the lightest influence to the end
+    order = np.argsort(blend_weights, axis=1, kind="stable")
+    blend_weights = np.roll(np.take_along_axis(
+        blend_weights, order, axis=1), -1, axis=1)
+    blend_indices = np.roll(np.take_along_axis(
+        blend_indices, order, axis=1), -1, axis=1)
+
+    return blend_weights.astype(np.uint8), blend_indices.astype(np.uint8)
+
+
+def get_vertex_dtype(vertex_type):
+    """Get a structured numpy dtype with one field per vertex layout component"""
+    fields = []
+    for name in vertex_type._fields:
+        if name in ("blendweights", "blendindices") or name.startswith("colour"):
+            fields.append((name, np.uint8, (4,)))
+        elif name.startswith("texcoord"):
+            fields.append((name, np.float32, (2,)))
+        elif name == "tangent":
+            fields.append((name, np.float32, (4,)))
+        else:
+            fields.append((name, np.float32, (3,)))
+    return np.dtype(fields)
+
+
+def get_loop_data(collection, attr, size, dtype=np.float32):
+    data = np.empty(len(collection) * size, dtype=dtype)
+    collection.foreach_get(attr, data)
+    return data.reshape(-1, size) if size > 1 else data
+
+
+def get_weld_tolerances(export_settings):
+    """Get the grid step used to quantize each vertex component when welding, 0 only welds identical values"""
+    # Normals closer than the weld angle are closer than the chord of that angle
+    normal_step = 2 * sin(export_settings.weld_normal_angle / 2)
+    return {
+        "position": export_settings.weld_position,
+        "normal": normal_step,
+        "tangent": normal_step,
+        "texcoord": export_settings.weld_uv,
+        "colour": export_settings.weld_colour,
+    }
+
+
+def get_weld_keys(vertices, tolerances):
+    """Quantize the components of every vertex to integers, vertices with the same key are welded together"""
+    keys = []
+    for name in vertices.dtype.names:
+        values = vertices[name].reshape(len(vertices), -1)
+        step = tolerances.get(name.rstrip("0123456789"), 0)
+        if step <= 0:
+            # Compare the exact bits
+            keys.append(values.view(np.uint8).reshape(len(vertices), -1))
+        elif name == "tangent":
+            # Keep the bitangent sign exact
+            keys.append(np.round(values[:, :3] / step).astype(np.int64).view(np.uint8).reshape(len(vertices), -1))
+            keys.append(values[:, 3:].view(np.uint8).reshape(len(vertices), -1))
+        else:
+            keys.append(np.round(values / step).astype(np.int64).view(np.uint8).reshape(len(vertices), -1))
 
-    return blend_weights, blend_indices
+    packed = np.ascontiguousarray(np.hstack(keys))
+    return packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
 
 
-def get_mesh_buffers(obj, mesh, vertex_type, bones=None, export_settings=None):
-    # thanks dexy
+def deduplicate_vertices(vertices, tolerances=None):
+    """Remove duplicate vertices, keeping the order in which each vertex is first used. Vertices whose components are
+    within tolerances of each other are welded into the first one. Returns the unique vertices and the index of each
+    original vertex in them."""
+    if len(vertices) == 0:
+        return vertices, np.empty(0, dtype=np.uint32)
 
-    blend_weights, blend_indices = get_blended_verts(
-        mesh, obj.vertex_groups, bones)
+    if tolerances and any(step > 0 for step in tolerances.values()):
+        packed = get_weld_keys(vertices, tolerances)
+    else:
+        packed = vertices.view(np.dtype((np.void, vertices.dtype.itemsize)))
+    _, first_index, inverse = np.unique(
+        packed, return_index=True, return_inverse=True)
 
-    vertices = {}
-    indices = []
+    # np.unique sorts by the packed bytes, put the vertices back in first seen order
+    order = np.argsort(first_index)
+    remap = np.empty(len(order), dtype=np.uint32)
+    remap[order] = np.arange(len(order), dtype=np.uint32)
 
-    for tri in mesh.loop_triangles:
-        for loop_idx in tri.loops:
-            loop = mesh.loops[loop_idx]
-            vert_idx = loop.vertex_index
-            mesh_layer_idx = 0
+    return vertices[first_index[order]], remap[inverse.ravel()]
 
-            kwargs = {}
 
-            if "position" in vertex_type._fields:
-                if mesh.vertices[vert_idx]:
-                    if export_settings.use_transforms:
-                        pos = float32_list(
-                            obj.matrix_world @ mesh.vertices[vert_idx].co)
-                    else:
-                        pos = float32_list(
-                            obj.matrix_basis @ mesh.vertices[vert_idx].co)
-                    kwargs['position'] = tuple(pos)
-                else:
-                    kwargs["position"] = tuple([0, 0, 0])
-            if "normal" in vertex_type._fields:
-                if loop.normal:
-                    normal = float32_list(
-                        obj.matrix_world.inverted_safe().transposed().to_3x3() @ loop.normal if export_settings.use_transforms else obj.matrix_basis.inverted_safe().transposed().to_3x3() @ loop.normal)
-                    kwargs["normal"] = tuple(normal)
-                else:
-                    kwargs["normal"] = tuple([0, 0, 0])
-            if "blendweights" in vertex_type._fields:
-                kwargs['blendweights'] = tuple(blend_weights[vert_idx])
-            if "blendindices" in vertex_type._fields:
-                kwargs['blendindices'] = tuple(blend_indices[vert_idx])
-            if "tangent" in vertex_type._fields:
-                if loop.tangent:
-                    tangent = float32_list(loop.tangent.to_4d())
-                    tangent[3] = loop.bitangent_sign  # convert to float 32 ?
-                    kwargs["tangent"] = tuple(tangent)
-                else:
-                    kwargs["tangent"] = tuple([0, 0, 0, 0])
-            for i in range(6):
-                if f"texcoord{i}" in vertex_type._fields:
-                    key = f'texcoord{i}'
-                    if mesh_layer_idx < len(mesh.uv_layers):
-                        data = mesh.uv_layers[mesh_layer_idx].data
-                        uv = float32_list(
-                            flip_uv(data[loop_idx].uv))
-                        kwargs[key] = tuple(uv)
-                        mesh_layer_idx += 1
-                    else:
-                        kwargs[key] = (0, 0)
-            for i in range(2):
-                if f"colour{i}" in vertex_type._fields:
-                    key = f'colour{i}'
-                    if i < len(mesh.vertex_colors):
-                        data = mesh.vertex_colors[i].data
-                        kwargs[key] = tuple(
-                            int(val * 255) for val in data[loop_idx].color)
-                    else:
-                        kwargs[key] = (0, 0, 0, 0)
+def get_mesh_buffers(obj, mesh, vertex_type, bones=None, export_settings=None, material_index=None, export_context=None):
+    """Get the vertex and index buffers of mesh, only including the triangles using material_index if it is given"""
+    key = (obj.as_pointer(), vertex_type._fields, material_index,
+           bones.id_data.as_pointer() if bones is not None else None, export_settings.use_transforms)
+    if ExportCache.active and key in ExportCache.buffers:
+        return ExportCache.buffers[key]
 
-            vertex = vertex_type(**kwargs)
+    buffers = build_mesh_buffers(
+        obj, mesh, vertex_type, bones, export_settings, material_index, export_context)
+    if ExportCache.active:
+        ExportCache.buffers[key] = buffers
+
+    return buffers
 
-            if vertex in vertices:
-                idx = vertices[vertex]
-            else:
-                idx = len(vertices)
-                vertices[vertex] = idx
 
-            indices.append(idx)
+def build_mesh_buffers(obj, mesh, vertex_type, bones=None, export_settings=None, material_index=None, export_context=None):
+    # thanks dexy
 
-    return vertices.keys(), indices
+    fields = vertex_type._fields
+    matrix = obj.matrix_world if export_settings.use_transforms else obj.matrix_basis
+
+    loop_indices = get_loop_data(mesh.loop_triangles, "loops", 3, np.int32)
+    if material_index is not None:
+        tri_materials = get_loop_data(
+            mesh.loop_triangles, "material_index", 1, np.int32)
+        # Like blender, triangles past the last material slot use the last one
+        tri_materials = np.minimum(tri_materials, len(mesh.materials) - 1)
+        loop_indices = loop_indices[tri_materials == material_index]
+    loop_indices = loop_indices.ravel()
+    vert_indices = get_loop_data(mesh.loops, "vertex_index", 1, np.int32)[loop_indices]
+
+    vertices = np.zeros(len(loop_indices), dtype=get_vertex_dtype(vertex_type))
+
+    if "position" in fields:
+        mat = np.array(matrix, dtype=np.float64)
+        positions = get_loop_data(mesh.vertices, "co", 3)[vert_indices]
+        vertices["position"] = positions @ mat[:3, :3].T + mat[:3, 3]
+    if "normal" in fields:
+        normal_mat = np.array(
+            matrix.inverted_safe().transposed().to_3x3(), dtype=np.float64)
+        normals = get_loop_data(mesh.loops, "normal", 3)[loop_indices]
+        vertices["normal"] = normals @ normal_mat.T
+    if "blendweights" in fields or "blendindices" in fields:
+        blend_weights, blend_indices = get_blended_verts(
+            mesh, obj.vertex_groups, bones, export_context)
+        if "blendweights" in fields:
+            vertices["blendweights"] = blend_weights[vert_indices]
+        if "blendindices" in fields:
+            vertices["blendindices"] = blend_indices[vert_indices]
+    if "tangent" in fields:
+        vertices["tangent"][:, :3] = get_loop_data(
+            mesh.loops, "tangent", 3)[loop_indices]
+        vertices["tangent"][:, 3] = get_loop_data(
+            mesh.loops, "bitangent_sign", 1)[loop_indices]
+
+    mesh_layer_idx = 0
+    for i in range(6):
+        key = f"texcoord{i}"
+        if key in fields and mesh_layer_idx < len(mesh.uv_layers):
+            uvs = get_loop_data(
+                mesh.uv_layers[mesh_layer_idx].data, "uv", 2)[loop_indices]
+            uvs[:, 1] = 1.0 - uvs[:, 1]
+            vertices[key] = uvs
+            mesh_layer_idx += 1
+    for i in range(2):
+        key = f"colour{i}"
+        if key in fields and i < len(mesh.vertex_colors):
+            colors = get_loop_data(
+                mesh.vertex_colors[i].data, "color", 4)[loop_indices]
+            vertices[key] = np.clip(colors.astype(np.float64) * 255, 0, 255)
+
+    # Get rid of negative zeros so they don't prevent vertices from being merged
+    for name in fields:
+        if vertices.dtype[name].base == np.float32:
+            vertices[name] += 0.0
+
+    return deduplicate_vertices(vertices, get_weld_tolerances(export_settings))
 
 
 def get_semantic_from_object(shader, mesh):
@@ -326,6 +533,13 @@ def get_semantic_from_object(shader, mesh):
 def apply_and_triangulate_object(obj):
     depsgraph = bpy.context.evaluated_depsgraph_get()
     obj_eval = obj.evaluated_get(depsgraph)
+
+    key = obj.as_pointer()
+    if ExportCache.active:
+        mesh = ExportCache.get_mesh(key)
+        if mesh is not None:
+            return obj_eval, mesh
+
     mesh = bpy.data.meshes.new_from_object(
         obj_eval, preserve_all_data_layers=True, depsgraph=depsgraph)
     tempmesh = bmesh.new()
@@ -335,14 +549,102 @@ def apply_and_triangulate_object(obj):
     tempmesh.free()
     mesh.calc_tangents()
     mesh.calc_loop_triangles()
+
+    if ExportCache.active:
+        # Removed when the export ends
+        ExportCache.meshes[key] = mesh
+
     return obj_eval, mesh
 
 
-def get_shader_index(mats, mat):
+def get_texture_signature(node):
+    """Get everything that is exported for the texture of an image node, in the shader and the texture dictionary"""
+    if node is None:
+        return None
+
+    flags = tuple(sorted(prop for prop in dir(node.texture_flags)
+                         if getattr(node.texture_flags, prop) == True))
+    return (node.texture_properties.embedded,
+            bpy.path.abspath(node.image.filepath) if node.image else None,
+            node.texture_properties.format,
+            node.texture_properties.usage,
+            node.texture_properties.extra_flags,
+            flags)
+
+
+def get_shader_signature(material, shader):
+    """Get everything that is exported for the shader of a material, materials with the same signature export the same
+    shader"""
+    nodes = material.node_tree.nodes
+    parameters = []
+    for param in shader.parameters:
+        if param.type == "Texture":
+            node = nodes.get(param.name)
+            parameters.append((param.name, param.type, param.texture_name, get_texture_signature(
+                node if isinstance(node, bpy.types.ShaderNodeTexImage) else None)))
+        else:
+            parameters.append(
+                (param.name, param.type, param.x, param.y, param.z, param.w))
+    return (shader.name, shader.filename, shader.render_bucket, tuple(parameters))
+
+
+def get_material_signature(material, shader=None, export_context=None):
+    key = material.as_pointer()
+    signature = export_context.shader_signatures.get(
+        key) if export_context else None
+    if signature is None:
+        if shader is None:
+            shader = get_shaders_from_blender([material], export_context)[0]
+        signature = get_shader_signature(material, shader)
+        if export_context:
+            export_context.shader_signatures[key] = signature
+    return signature
+
+
+def merge_materials(materials, shaders, name, export_context=None):
+    """Keep one material for every distinct shader of a shader group. Materials exporting the same shader as a material
+    before them in the group use the shader of that material. Returns the merged materials and shaders."""
+    merged = []
+    merged_shaders = []
+    canonicals = {}
+    for mat, shader in zip(materials, shaders):
+        signature = get_material_signature(mat, shader, export_context)
+        canonical = canonicals.get(signature)
+        if canonical is None:
+            canonicals[signature] = mat
+            merged.append(mat)
+            merged_shaders.append(shader)
+        elif canonical.as_pointer() != mat.as_pointer() and export_context:
+            export_context.merged_materials.append(
+                (name, mat.name, canonical.name))
+
+    return merged, merged_shaders
+
+
+def get_export_materials(obj, export_settings, materials=None, export_context=None):
+    """Get the materials used by obj and their shaders, merged by shader signature if enabled in the export settings"""
+    if not materials:
+        materials = get_used_materials(obj)
+    shaders = get_shaders_from_blender(materials, export_context)
+    if export_settings.merge_materials:
+        materials, shaders = merge_materials(
+            materials, shaders, obj.name, export_context)
+    return materials, shaders
+
+
+def get_shader_index(mats, mat, export_context=None):
     for i in range(len(mats)):
         if mats[i].as_pointer() == mat.as_pointer():
             return i
 
+    # Merged materials use the shader of the material with the same signature
+    if mat.node_tree is None:
+        return None
+    signature = get_material_signature(mat, export_context=export_context)
+    for i in range(len(mats)):
+        if get_material_signature(mats[i], export_context=export_context) == signature:
+            return i
+
 
 def get_bone_ids(obj, bones=None):
     bone_count = 0
@@ -357,20 +659,31 @@ def get_bone_ids(obj, bones=None):
     return [id for id in range(bone_count)]
 
 
-def geometry_from_object(obj, mats, bones=None, export_settings=None):
+def geometry_from_buffers(obj, vertex_buffer, index_buffer, layout, shader_index, bone_ids, export_settings):
     geometry = GeometryItem()
 
-    geometry.shader_index = get_shader_index(mats, obj.active_material)
+    geometry.shader_index = shader_index
+    geometry.bone_ids = bone_ids
+    geometry.vertex_buffer.layout = layout.value
+    geometry.vertex_buffer.data = vertex_buffer
+    geometry.index_buffer.data = index_buffer
 
-    obj, mesh = apply_and_triangulate_object(obj)
+    if len(vertex_buffer) > 0:
+        positions = vertex_buffer["position"]
+        geometry.bounding_box_min = Vector(positions.min(axis=0))
+        geometry.bounding_box_max = Vector(positions.max(axis=0))
+    else:
+        bbmin, bbmax = get_bound_extents(
+            obj, world=export_settings.use_transforms)
+        geometry.bounding_box_min = bbmin
+        geometry.bounding_box_max = bbmax
 
-    bbmin, bbmax = get_bound_extents(obj, world=export_settings.use_transforms)
-    geometry.bounding_box_min = bbmin
-    geometry.bounding_box_max = bbmax
+    return geometry
 
-    geometry.bone_ids = get_bone_ids(obj, bones)
 
-    shader_name = obj.active_material.shader_properties.name
+def mesh_buffers_from_mesh(obj, mesh, mat, bones=None, export_settings=None, material_index=None, export_context=None):
+    """Get the vertex layout and the vertex and index buffers of the triangles of mesh using mat"""
+    shader_name = mat.shader_properties.name
     shader = ShaderManager.shaders[shader_name]
 
     is_skinned = False
@@ -380,20 +693,117 @@ def geometry_from_object(obj, mats, bones=None, export_settings=None):
     layout = shader.get_layout_from_semantic(
         get_semantic_from_object(shader, mesh), is_skinned=is_skinned)
 
-    geometry.vertex_buffer.layout = layout.value
     vertex_buffer, index_buffer = get_mesh_buffers(
-        obj, mesh, layout.vertex_type, bones, export_settings)
+        obj, mesh, layout.vertex_type, bones, export_settings, material_index, export_context)
 
-    geometry.vertex_buffer.data = vertex_buffer
-    geometry.index_buffer.data = index_buffer
+    return layout, vertex_buffer, index_buffer
 
-    # Remove mesh copy
-    bpy.data.meshes.remove(mesh)
-
-    return geometry
 
+def mesh_buffers_from_object(obj, bones=None, export_settings=None, export_context=None):
+    """Get (material, layout, vertex buffer, index buffer) for each material used by obj, in material slot order"""
+    obj, mesh = apply_and_triangulate_object(obj)
 
-def drawable_model_from_object(obj, bones=None, materials=None, export_settings=None):
+    try:
+        slots = [slot.material for slot in obj.material_slots]
+        if len(slots) < 2:
+            return [(obj.active_material, *mesh_buffers_from_mesh(
+                obj, mesh, obj.active_material, bones, export_settings, None, export_context))]
+
+        tri_materials = get_loop_data(
+            mesh.loop_triangles, "material_index", 1, np.int32)
+        used_indices = set(np.unique(np.minimum(tri_materials, len(slots) - 1)).tolist())
+
+        buffers = []
+        for material_index, mat in enumerate(slots):
+            if mat is None or material_index not in used_indices:
+                continue
+            buffers.append((mat, *mesh_buffers_from_mesh(
+                obj, mesh, mat, bones, export_settings, material_index, export_context)))
+
+        return buffers
+    finally:
+        # Remove mesh copy, unless it is kept for the rest of the export
+        if not ExportCache.active:
+            bpy.data.meshes.remove(mesh)
+
+
+def merge_mesh_buffers(buffers, export_settings):
+    """Merge the (vertex buffer, index buffer) of several objects into one, welding the vertices they share"""
+    if len(buffers) == 1:
+        return buffers[0]
+
+    index_buffers = []
+    offset = 0
+    for vertex_buffer, index_buffer in buffers:
+        index_buffers.append(index_buffer.astype(np.uint32) + offset)
+        offset += len(vertex_buffer)
+
+    vertices, remap = deduplicate_vertices(np.concatenate(
+        [vertex_buffer for vertex_buffer, _ in buffers]), get_weld_tolerances(export_settings))
+
+    return vertices, remap[np.concatenate(index_buffers)]
+
+
+def get_vertex_bones(vertices):
+    """Get the bone of each blend influence of vertices, -1 for influences without weight"""
+    return np.where(vertices["blendweights"] > 0, vertices["blendindices"].astype(np.int32), -1)
+
+
+def compact_bone_palette(vertices):
+    """Remap the blend indices of vertices to a palette of the bones their weights use. Returns the new vertices and
+    the palette, the bone ids of the geometry."""
+    bones = get_vertex_bones(vertices)
+    palette = np.unique(bones[bones != -1])
+    if len(palette) == 0:
+        palette = np.zeros(1, dtype=np.int32)
+
+    # Influences without weight point at the first bone of the palette
+    remap = np.zeros(256, dtype=np.uint8)
+    remap[palette] = np.arange(len(palette), dtype=np.uint8)
+    vertices = vertices.copy()
+    vertices["blendindices"] = remap[vertices["blendindices"]]
+
+    return vertices, palette.tolist()
+
+
+def geometries_from_buffers(obj, name, vertex_buffer, index_buffer, layout, shader_index, bone_ids, export_settings,
+                            export_context=None):
+    """Get the geometries of a vertex and index buffer, split when they have more vertices than a 16-bit index buffer
+    can address or skinned vertices using more bones than a bone palette can hold, or into spatial chunks of at most
+    chunk_triangles triangles when chunking is enabled"""
+    triangles = index_buffer.reshape(-1, 3)
+    max_triangles = export_settings.chunk_triangles if export_settings.chunk_geometries else None
+    is_skinned = "blendindices" in vertex_buffer.dtype.names and "blendweights" in vertex_buffer.dtype.names
+    vertex_bones = get_vertex_bones(vertex_buffer) if is_skinned else None
+
+    buffers = [(vertex_buffer, index_buffer)]
+    if len(vertex_buffer) > MAX_GEOMETRY_VERTICES or (max_triangles is not None and len(triangles) > max_triangles) or (
+            is_skinned and get_used_bone_count(vertex_bones, np.arange(len(vertex_buffer))) > MAX_GEOMETRY_BONES):
+        # Vertices on the borders between pieces are duplicated in each piece
+        buffers = [compact_vertices(vertex_buffer, triangles[part].ravel())
+                   for part in split_triangles_spatially(vertex_buffer["position"], triangles, MAX_GEOMETRY_VERTICES,
+                                                         max_triangles, vertex_bones, MAX_GEOMETRY_BONES)]
+
+    geometries = []
+    for i, (vertex_buffer, index_buffer) in enumerate(buffers):
+        if is_skinned:
+            # Only upload the bones used by this geometry, blend indices point into its palette
+            vertex_buffer, bone_ids = compact_bone_palette(vertex_buffer)
+        if export_settings.optimize_vertex_cache:
+            vertex_buffer, index_buffer, acmr_before, acmr_after = optimize_vertex_cache(
+                vertex_buffer, index_buffer)
+            if export_context:
+                part_name = name if len(buffers) == 1 else f"{name} (part {i + 1})"
+                export_context.vertex_cache_stats.append(
+                    (part_name, acmr_before, acmr_after))
+
+        geometries.append(geometry_from_buffers(
+            obj, vertex_buffer, index_buffer, layout, shader_index, bone_ids, export_settings))
+
+    return geometries
+
+
+def drawable_model_from_object(obj, bones=None, materials=None, export_settings=None, export_context=None):
     drawable_model = DrawableModelItem()
 
     drawable_model.render_mask = obj.drawable_model_properties.render_mask
@@ -404,43 +814,142 @@ def drawable_model_from_object(obj, bones=None, materials=None, export_settings=
     if obj.children[0].vertex_groups:
         drawable_model.has_skin = 1
 
-    for child in obj.children:
-        if child.sollum_type == SollumType.DRAWABLE_GEOMETRY:
-            if len(child.data.materials) > 1:
-                # Preserve original order of materials
-                child_copy = duplicate_object(child)
-                objs = split_object(child_copy)
-                for obj in objs:
-                    geometry = geometry_from_object(
-                        obj, materials, bones, export_settings)  # MAYBE WRONG ASK LOYALIST
-                    drawable_model.geometries.append(geometry)
-                    bpy.data.objects.remove(obj)
-            else:
-                geometry = geometry_from_object(
-                    child, materials, bones, export_settings)
-                drawable_model.geometries.append(geometry)
+    # Buffers of every geometry object grouped by shader and vertex layout, merged in memory so the objects in the
+    # scene are left untouched. One geometry is exported per material, like if the objects were joined.
+    groups = {}
+    for child in get_drawable_geometries(obj):
+        bone_ids = get_bone_ids(child, bones)
+        for mat, layout, vertex_buffer, index_buffer in mesh_buffers_from_object(child, bones, export_settings,
+                                                                                 export_context):
+            shader_index = get_shader_index(materials, mat, export_context)
+            key = (shader_index, layout.value)
+            if key not in groups:
+                groups[key] = (mat, layout, bone_ids, [])
+            groups[key][3].append((vertex_buffer, index_buffer))
+
+    for (shader_index, _), (mat, layout, bone_ids, buffers) in groups.items():
+        vertex_buffer, index_buffer = merge_mesh_buffers(
+            buffers, export_settings)
+        drawable_model.geometries.extend(geometries_from_buffers(
+            obj, f"{obj.name} ({mat.name})", vertex_buffer, index_buffer, layout, shader_index, bone_ids, export_settings,
+            export_context))
 
     return drawable_model
 
 
-def bone_from_object(obj):
+def lod_model_from_model(model, ratio):
+    lod_model = DrawableModelItem()
+    lod_model.render_mask = model.render_mask
+    lod_model.flags = model.flags
+    lod_model.has_skin = model.has_skin
+    lod_model.bone_index = model.bone_index
+    lod_model.unknown_1 = model.unknown_1
+
+    for geometry in model.geometries:
+        vertex_buffer, index_buffer = get_decimated_geometry(
+            geometry.vertex_buffer.data, geometry.index_buffer.data, ratio)
+        if len(index_buffer) == 0:
+            continue
+
+        lod_geometry = GeometryItem()
+        lod_geometry.shader_index = geometry.shader_index
+        lod_geometry.bone_ids = geometry.bone_ids
+        lod_geometry.vertex_buffer.layout = geometry.vertex_buffer.layout
+        lod_geometry.vertex_buffer.data = vertex_buffer
+        lod_geometry.index_buffer.data = index_buffer
+        positions = vertex_buffer["position"]
+        lod_geometry.bounding_box_min = Vector(positions.min(axis=0))
+        lod_geometry.bounding_box_max = Vector(positions.max(axis=0))
+        lod_model.geometries.append(lod_geometry)
+
+    return lod_model
+
+
+def get_model_vertex_count(models):
+    return sum(len(geometry.vertex_buffer.data) for model in models for geometry in model.geometries)
+
+
+def generate_lod_models(drawable, obj):
+    """Generate the medium, low and very low models of a drawable by decimating its high models"""
+    lod_lists = (("medium", drawable.drawable_models_med), ("low",
+                 drawable.drawable_models_low), ("very_low", drawable.drawable_models_vlow))
+
+    previous_count = get_model_vertex_count(drawable.drawable_models_high)
+    generated_count = 0
+    for level, models in lod_lists:
+        lod_models = [lod_model_from_model(model, LOD_RATIOS[level])
+                      for model in drawable.drawable_models_high]
+        count = get_model_vertex_count(lod_models)
+        # Stop once decimation can't simplify the mesh any further
+        if count == 0 or count > previous_count * (1 - MIN_REDUCTION):
+            break
+        models.extend(lod_models)
+        previous_count = count
+        generated_count += 1
+
+    # Only replace lod distances that were left at their default, the last populated level keeps 9998 so it is drawn
+    # at any distance
+    props = obj.drawable_properties
+    if generated_count == 0 or (props.lod_dist_high, props.lod_dist_med, props.lod_dist_low, props.lod_dist_vlow) != (9998, 9998, 9998, 9998):
+        return
+
+    distances = list(get_lod_distances(drawable.bounding_sphere_radius))
+    distances[generated_count:] = [9998] * (4 - generated_count)
+    drawable.lod_dist_high, drawable.lod_dist_med, drawable.lod_dist_low, drawable.lod_dist_vlow = distances
+
+
+SkeletonTable = collections.namedtuple(
+    "SkeletonTable", ["bones", "parents", "siblings", "transforms"])
+
+
+def get_skeleton_table(obj, export_context=None):
+    """Get the bones of an armature with the parent index, sibling index and local transform (location, rotation,
+    scale) of each one. Bone indices follow the order of the pose bones. Built once per armature for the whole export."""
+    key = obj.data.as_pointer()
+    table = export_context.skeleton_tables.get(key) if export_context else None
+    if table is not None and len(table.bones) == len(obj.pose.bones):
+        return table
+
+    bones = [pbone.bone for pbone in obj.pose.bones]
+    indices = {bone.name: i for i, bone in enumerate(bones)}
+    parents = np.full(len(bones), -1, dtype=np.int32)
+    siblings = np.full(len(bones), -1, dtype=np.int32)
+
+    for i, bone in enumerate(bones):
+        if bone.parent is not None:
+            parents[i] = indices[bone.parent.name]
+        # The sibling of a bone is the next child of the same parent
+        children = [indices[child.name] for child in bone.children]
+        siblings[children[:-1]] = children[1:]
+
+    inverted = {}
+    transforms = []
+    for i, bone in enumerate(bones):
+        mat = bone.matrix_local
+        if parents[i] != -1:
+            parent = parents[i]
+            if parent not in inverted:
+                inverted[parent] = bones[parent].matrix_local.inverted()
+            mat = inverted[parent] @ mat
+        transforms.append(mat.decompose())
+
+    table = SkeletonTable(bones, parents, siblings, transforms)
+    if export_context:
+        export_context.skeleton_tables[key] = table
+        export_context.skeleton_unknowns.pop(key, None)
+    return table
+
+
+def bone_from_object(obj, index, table):
 
     bone = BoneItem()
     bone.name = obj.name
     bone.tag = obj.bone_properties.tag
-    bone.index = obj["BONE_INDEX"]
-
-    if obj.parent != None:
-        bone.parent_index = obj.parent["BONE_INDEX"]
-        children = obj.parent.children
-        sibling = -1
-        if len(children) > 1:
-            for i, child in enumerate(children):
-                if child["BONE_INDEX"] == obj["BONE_INDEX"] and i + 1 < len(children):
-                    sibling = children[i + 1]["BONE_INDEX"]
-                    break
+    bone.index = index
 
-        bone.sibling_index = sibling
+    if table.parents[index] != -1:
+        bone.parent_index = int(table.parents[index])
+        bone.sibling_index = int(table.siblings[index])
 
     for flag in obj.bone_properties.flags:
         if len(flag.name) == 0:
@@ -451,15 +960,11 @@ def bone_from_object(obj):
     if len(obj.children) > 0:
         bone.flags.append("Unk0")
 
-    mat = obj.matrix_local
-    if (obj.parent != None):
-        mat = obj.parent.matrix_local.inverted() @ obj.matrix_local
-
-    mat_decomposed = mat.decompose()
+    translation, rotation, scale = table.transforms[index]
 
-    bone.translation = mat_decomposed[0]
-    bone.rotation = mat_decomposed[1]
-    bone.scale = mat_decomposed[2]
+    bone.translation = translation.copy()
+    bone.rotation = rotation.copy()
+    bone.scale = scale.copy()
     # transform_unk doesn't appear in openformats so oiv calcs it right
     # what does it do? the bone length?
     # default value for this seems to be <TransformUnk x="0" y="4" z="-3" w="0" />
@@ -477,52 +982,49 @@ def calculate_skeleton_unks(skel):
     if skel is None or len(skel.bones) == 0:
         return
 
-    unk_50 = []
-    unk_58 = []
-    for bone in skel.bones:
+    # Hash the space separated strings of every bone as they are built instead of joining them first
+    unk_50 = 0
+    unk_54 = 0
+    unk_58 = 0
+    for i, bone in enumerate(skel.bones):
         unk_50_str = ' '.join((str(bone.tag), ' '.join(bone.flags)))
+        unk_58_str = ' '.join((unk_50_str, ' '.join(str(item) for item in bone.translation), ' '.join(
+            str(item) for item in bone.rotation), ' '.join(str(item) for item in bone.scale)))
+        if i > 0:
+            unk_50_str = ' ' + unk_50_str
+            unk_58_str = ' ' + unk_58_str
 
-        translation = []
-        for item in bone.translation:
-            translation.append(str(item))
-
-        rotation = []
-        for item in bone.rotation:
-            rotation.append(str(item))
-
-        scale = []
-        for item in bone.scale:
-            scale.append(str(item))
-
-        unk_58_str = ' '.join((str(bone.tag), ' '.join(bone.flags), ' '.join(
-            translation), ' '.join(rotation), ' '.join(scale)))
-        unk_50.append(unk_50_str)
-        unk_58.append(unk_58_str)
+        unk_50 = jenkhash.Accumulate(unk_50, unk_50_str)
+        unk_54 = zlib.crc32(unk_50_str.encode(), unk_54)
+        unk_58 = zlib.crc32(unk_58_str.encode(), unk_58)
 
-    skel.unknown_50 = jenkhash.Generate(' '.join(unk_50))
-    skel.unknown_54 = zlib.crc32(' '.join(unk_50).encode())
-    skel.unknown_58 = zlib.crc32(' '.join(unk_58).encode())
+    skel.unknown_50 = jenkhash.Finalize(unk_50)
+    skel.unknown_54 = unk_54
+    skel.unknown_58 = unk_58
 
 
-def skeleton_from_object(obj):
+def skeleton_from_object(obj, export_context=None):
 
     if obj.type != 'ARMATURE' or len(obj.pose.bones) == 0:
         return None
 
     skeleton = SkeletonProperty()
-    bones = obj.pose.bones
+    table = get_skeleton_table(obj, export_context)
 
-    ind = 0
-    for pbone in bones:
-        bone = pbone.bone
-        bone["BONE_INDEX"] = ind
-        ind = ind + 1
+    for index, bone in enumerate(table.bones):
+        skeleton.bones.append(bone_from_object(bone, index, table))
 
-    for pbone in bones:
-        bone = bone_from_object(pbone.bone)
-        skeleton.bones.append(bone)
+    # Only depend on the bones, so they are the same for every drawable using the armature
+    if export_context is None:
+        calculate_skeleton_unks(skeleton)
+        return skeleton
 
-    calculate_skeleton_unks(skeleton)
+    key = obj.data.as_pointer()
+    if key not in export_context.skeleton_unknowns:
+        calculate_skeleton_unks(skeleton)
+        export_context.skeleton_unknowns[key] = (
+            skeleton.unknown_50, skeleton.unknown_54, skeleton.unknown_58)
+    skeleton.unknown_50, skeleton.unknown_54, skeleton.unknown_58 = export_context.skeleton_unknowns[key]
 
     return skeleton
 
@@ -554,7 +1056,7 @@ def joints_from_object(obj):
 
 def light_from_object(obj, export_settings, armature_obj=None):
     light = LightItem()
-    light.position = obj.location if not export_settings.use_transforms else obj.location + \
+    light.position = obj.location.copy() if not export_settings.use_transforms else obj.location + \
         obj.parent.location
     mat = obj.matrix_basis if not export_settings.use_transforms else obj.matrix_world
     light.direction = Vector(
@@ -623,8 +1125,26 @@ def lights_from_object(obj, lights_xml, export_settings, armature_obj=None):
                                export_settings, armature_obj)
 
 
+def is_skeleton_needed(drawable):
+    """Check if anything in drawable is skinned, attached to a bone or limits the rotation of a bone"""
+    for models in (drawable.drawable_models_high, drawable.drawable_models_med,
+                   drawable.drawable_models_low, drawable.drawable_models_vlow):
+        for model in models or []:
+            if model.has_skin or model.bone_index != 0:
+                return True
+
+    if any(light.bone_id for light in drawable.lights or []):
+        return True
+
+    return drawable.joints is not None and len(drawable.joints.rotation_limits) > 0
+
+
 # REALLY NOT A FAN OF PASSING THIS EXPORT OP TO THIS AND APPENDING TO MESSAGES BUT WHATEVER
-def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None, export_settings=None, is_frag=False, write_shaders=True):
+def drawable_from_object_steps(exportop, obj, exportpath, bones=None, materials=None, export_settings=None, is_frag=False, write_shaders=True, foldername=None, write_skeleton=True, armature_obj=None):
+    """Generator version of drawable_from_object, yields the name of each model as it is exported"""
+    # The skeleton is read from armature_obj when the drawable is bound to an armature outside of it
+    skeleton_obj = armature_obj if armature_obj is not None else obj
+    export_context = getattr(exportop, "export_context", None)
     drawable = None
     if is_frag:
         drawable = FragmentDrawable()
@@ -634,13 +1154,11 @@ def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None,
     drawable.name = obj.name if "." not in obj.name else obj.name.split(".")[0]
 
     if is_frag:
-        drawable.matrix = obj.matrix_basis
+        drawable.matrix = obj.matrix_basis.copy()
     bbmin, bbmax = get_bound_extents(
         obj, world=export_settings.use_transforms)
-    drawable.bounding_sphere_center = get_bound_center(
+    drawable.bounding_sphere_center, drawable.bounding_sphere_radius = get_bound_sphere(
         obj, world=export_settings.use_transforms)
-    drawable.bounding_sphere_radius = get_sphere_radius(
-        bbmax, drawable.bounding_sphere_center)
     drawable.bounding_box_min = bbmin
     drawable.bounding_box_max = bbmax
 
@@ -649,9 +1167,10 @@ def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None,
     drawable.lod_dist_low = obj.drawable_properties.lod_dist_low
     drawable.lod_dist_vlow = obj.drawable_properties.lod_dist_vlow
 
-    if not materials:
-        materials = get_used_materials(obj)
-    shaders = get_shaders_from_blender(materials)
+    materials, shaders = get_export_materials(
+        obj, export_settings, materials, export_context)
+    # Source file of each embedded texture, keyed by texture name
+    texture_sources = {}
 
     if len(shaders) == 0:
         raise Exception(
@@ -661,27 +1180,38 @@ def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None,
         for shader in shaders:
             drawable.shader_group.shaders.append(shader)
 
+        if foldername is None:
             foldername = obj.name
             if is_frag:
                 # trim blenders .001 suffix
                 foldername = obj.parent.name[:-3].replace("pack:/", "")
 
-            td, messages = texture_dictionary_from_materials(
-                foldername, materials, os.path.dirname(exportpath))
-            drawable.shader_group.texture_dictionary = td
-            exportop.messages += messages
+        td, messages = texture_dictionary_from_materials(
+            foldername, materials, os.path.dirname(exportpath), getattr(exportop, "texture_copier", None),
+            texture_sources, export_context)
+        drawable.shader_group.texture_dictionary = td
+        exportop.messages += messages
+
+        # Remember the result for the ytyp archetypes written after the export
+        if export_context:
+            embedded_textures = export_context.embedded_textures
+            embedded_textures[obj.name] = td is not None
+            if obj.parent is not None:
+                embedded_textures[obj.parent.name] = embedded_textures.get(
+                    obj.parent.name, False) or td is not None
     else:
         drawable.shader_group = None
 
     if bones is None:
-        if obj.pose is not None:
-            bones = obj.pose.bones
+        if skeleton_obj.pose is not None:
+            bones = skeleton_obj.pose.bones
 
-    drawable.skeleton = skeleton_from_object(obj)
-    drawable.joints = joints_from_object(obj)
-    if obj.pose is not None:
+    drawable.skeleton = skeleton_from_object(
+        skeleton_obj, export_context) if write_skeleton else None
+    drawable.joints = joints_from_object(skeleton_obj)
+    if skeleton_obj.pose is not None and drawable.skeleton is not None:
         for bone in drawable.skeleton.bones:
-            pbone = obj.pose.bones[bone.index]
+            pbone = skeleton_obj.pose.bones[bone.index]
             for con in pbone.constraints:
                 if con.type == 'LIMIT_ROTATION':
                     bone.flags.append("LimitRotation")
@@ -694,10 +1224,8 @@ def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None,
 
     for child in obj.children:
         if child.sollum_type == SollumType.DRAWABLE_MODEL:
-            # join drawable geometries
-            join_objects(get_drawable_geometries(child))
             drawable_model = drawable_model_from_object(
-                child, bones, materials, export_settings)
+                child, bones, materials, export_settings, export_context)
             if child.drawable_model_properties.sollum_lod == LODLevel.HIGH:
                 highmodel_count += 1
                 drawable.drawable_models_high.append(drawable_model)
@@ -710,6 +1238,7 @@ def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None,
             elif child.drawable_model_properties.sollum_lod == LODLevel.VERYLOW:
                 vlowmodel_count += 1
                 drawable.drawable_models_vlow.append(drawable_model)
+            yield child.name
         if child.sollum_type in BOUND_TYPES:
             if child.sollum_type == SollumType.BOUND_COMPOSITE:
                 drawable.bounds.append(
@@ -718,7 +1247,14 @@ def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None,
                 drawable.bounds.append(
                     bound_from_object(child, export_settings))
         else:
-            lights_from_object(child, drawable.lights, export_settings, obj)
+            lights_from_object(child, drawable.lights,
+                               export_settings, skeleton_obj)
+
+    if export_settings.auto_lods and highmodel_count > 0 and medmodel_count + lowhmodel_count + vlowmodel_count == 0:
+        generate_lod_models(drawable, obj)
+        medmodel_count = len(drawable.drawable_models_med)
+        lowhmodel_count = len(drawable.drawable_models_low)
+        vlowmodel_count = len(drawable.drawable_models_vlow)
 
     # flags = model count for each lod
     drawable.flags_high = highmodel_count
@@ -727,9 +1263,24 @@ def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None,
     drawable.flags_vlow = vlowmodel_count
     # drawable.unknown_9A = ?
 
+    if export_settings.export_report and export_context:
+        # The report is made at the end of the export, once nothing changes the drawable anymore
+        export_context.reported_drawables.append(
+            (drawable, exportpath, texture_sources))
+
     return drawable
 
 
+def drawable_from_object(exportop, obj, exportpath, bones=None, materials=None, export_settings=None, is_frag=False, write_shaders=True, foldername=None, write_skeleton=True, armature_obj=None):
+    return run_steps(drawable_from_object_steps(exportop, obj, exportpath, bones, materials, export_settings, is_frag,
+                                                write_shaders, foldername, write_skeleton, armature_obj))
+
+
+def export_ydr_steps(exportop, obj, filepath, export_settings):
+    """Generator version of export_ydr, yields the name of each model as it is exported"""
+    drawable = yield from drawable_from_object_steps(exportop, obj, filepath, None, None, export_settings)
+    XmlWriter.write(drawable, filepath)
+
+
 def export_ydr(exportop, obj, filepath, export_settings):
-    drawable_from_object(exportop, obj, filepath, None, None,
-                         export_settings).write_xml(filepath)
+    run_steps(export_ydr_steps(exportop, obj, filepath, export_settings))
@@ -13,12 +13,42 @@ from .properties import LightFlags
 from ..tools.drawablehelper import join_drawable_geometries
 
 
-def shadergroup_to_materials(shadergroup, filepath):
+LOD_MODEL_TAGS = {
+    LODLevel.HIGH: "DrawableModelsHigh",
+    LODLevel.MEDIUM: "DrawableModelsMedium",
+    LODLevel.LOW: "DrawableModelsLow",
+    LODLevel.VERYLOW: "DrawableModelsVeryLow",
+}
+
+
+def get_excluded_lod_tags(import_settings):
+    """Get the xml tags of the drawable model lists not selected in the import settings"""
+    if import_settings is None:
+        return None
+
+    return [tag for lod, tag in LOD_MODEL_TAGS.items() if lod.value not in import_settings.import_lods]
+
+
+def get_used_shader_indices(drawables):
+    """Get the indices of the shaders referenced by the geometries of the given drawables"""
+    indices = set()
+    for drawable in drawables:
+        for model in drawable.all_models:
+            for geometry in model.geometries:
+                indices.add(geometry.shader_index)
+    return indices
+
+
+def shadergroup_to_materials(shadergroup, filepath, shader_indices=None):
+    """Create a material for each shader. When shader_indices is given, shaders not in it are skipped and None is put in their place."""
     materials = []
 
     texture_folder = os.path.dirname(
         filepath) + "\\" + os.path.basename(filepath)[:-8]
-    for shader in shadergroup.shaders:
+    for i, shader in enumerate(shadergroup.shaders):
+        if shader_indices is not None and i not in shader_indices:
+            materials.append(None)
+            continue
 
         material = create_shader(shader.name, shader.filename)
 
@@ -310,7 +340,14 @@ def light_to_obj(light, armature_obj=None):
     return lobj
 
 
-def obj_from_buffer(vertex_buffer, index_buffer, material, bones=None, name=None, bone_ids=None):
+def get_palette_bone(palette, index):
+    """Get the bone index a blend index points to in the bone palette (BoneIDs) of a geometry"""
+    if palette and index < len(palette):
+        return palette[index]
+    return index
+
+
+def obj_from_buffer(vertex_buffer, index_buffer, material, bones=None, name=None, bone_ids=None, palette=None):
     vertices = []
     normals = []
     texcoords = {}
@@ -375,7 +412,7 @@ def obj_from_buffer(vertex_buffer, index_buffer, material, bones=None, name=None
             for vertex_idx, vertex in enumerate(vertex_buffer):
                 for i in range(0, 4):
                     weight = vertex.blendweights[i] / 255
-                    index = vertex.blendindices[i]
+                    index = get_palette_bone(palette, vertex.blendindices[i])
                     if (weight > 0.0):
                         obj.vertex_groups[index].add(
                             [vertex_idx], weight, "ADD")
@@ -392,7 +429,7 @@ def geometry_to_obj(geometry, material, bones=None, name=None):
     vertex_buffer = geometry.vertex_buffer.get_data()
     index_buffer = [geometry.index_buffer.data[i * 3:(i + 1) * 3]
                     for i in range((len(geometry.index_buffer.data) + 3 - 1) // 3)]
-    return obj_from_buffer(vertex_buffer, index_buffer, material, bones, name)
+    return obj_from_buffer(vertex_buffer, index_buffer, material, bones, name, palette=geometry.bone_ids)
 
 
 def geometry_to_obj_split_by_bone(model, materials, bones):
@@ -415,7 +452,7 @@ def geometry_to_obj_split_by_bone(model, materials, bones):
                 inds = vert.blendindices
                 for idx, w in enumerate(vert.blendweights):
                     if w != 0:
-                        ind = inds[idx]
+                        ind = get_palette_bone(geo.bone_ids, inds[idx])
                         if ind not in key:
                             key.append(ind)
             key.sort()
@@ -462,7 +499,7 @@ def geometry_to_obj_split_by_bone(model, materials, bones):
             faces = bone_ind_map[bone]
 
             obj = obj_from_buffer(
-                verts, faces, materials[geo.shader_index], bones, "vgs", None)
+                verts, faces, materials[geo.shader_index], bones, "vgs", None, geo.bone_ids)
 
             if bone not in object_map:
                 object_map[bone] = []
@@ -494,6 +531,8 @@ def drawable_model_to_obj(model, materials, name, lod, bones=None, import_settin
         for child_obj in child_objs:
             child_obj.parent = dobj
             for mat in materials:
+                if mat is None:
+                    continue
                 child_obj.data.materials.append(mat)
             create_tinted_shader_graph(child_obj)
     else:
@@ -526,7 +565,11 @@ def create_lights(lights, parent, armature_obj=None):
 def drawable_to_obj(drawable, filepath, name, bones_override=None, materials=None, import_settings=None):
 
     if not materials:
-        materials = shadergroup_to_materials(drawable.shader_group, filepath)
+        shader_indices = None
+        if get_excluded_lod_tags(import_settings):
+            shader_indices = get_used_shader_indices([drawable])
+        materials = shadergroup_to_materials(
+            drawable.shader_group, filepath, shader_indices)
 
     obj = None
     bones = None
@@ -608,7 +651,8 @@ def drawable_to_obj(drawable, filepath, name, bones_override=None, materials=Non
 
 
 def import_ydr(filepath, import_settings):
-    ydr_xml = YDR.from_xml_file(filepath)
+    ydr_xml = YDR.from_xml_file(
+        filepath, get_excluded_lod_tags(import_settings))
     drawable = drawable_to_obj(ydr_xml, filepath, os.path.basename(
         filepath.replace(YDR.file_extension, '')), None, None, import_settings)
     if import_settings.join_geometries:
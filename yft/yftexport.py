@@ -1,12 +1,14 @@
 import os
 from ..yft.yftimport import get_fragment_drawable
 from ..sollumz_properties import BOUND_TYPES, SollumType
-from ..ydr.ydrexport import drawable_from_object, get_used_materials, lights_from_object
+from ..ydr.ydrexport import drawable_from_object_steps, get_export_materials, get_shader_index, lights_from_object
 from ..ybn.ybnexport import composite_from_objects
 from ..resources.fragment import BoneTransformItem, ChildrenItem, Fragment, GroupItem, LODProperty, TransformItem, WindowItem
 from ..sollumz_helper import get_sollumz_objects_from_objects
 from ..tools.fragmenthelper import image_to_shattermap
 from ..tools.meshhelper import *
+from ..tools.utils import run_steps
+from ..tools.xmlhelper import XmlWriter
 
 
 def get_group_objects(fragment, index=0):
@@ -38,7 +40,7 @@ def get_shattermap_image(obj):
     return mat.node_tree.nodes["ShatterMap"].image
 
 
-def obj_to_vehicle_window(obj, materials):
+def obj_to_vehicle_window(obj, materials, export_context=None):
     mesh = obj.data
 
     v1 = None
@@ -73,14 +75,16 @@ def obj_to_vehicle_window(obj, materials):
     window = WindowItem()
     window.projection_matrix = mat
     window.shattermap = image_to_shattermap(shattermap)
-    window.unk_ushort_1 = materials.index(obj.data.materials[1])
+    window.unk_ushort_1 = get_shader_index(
+        materials, obj.data.materials[1], export_context)
     window.unk_float_17 = obj.vehicle_window_properties.unk_float_17
     window.unk_float_18 = obj.vehicle_window_properties.unk_float_18
     window.cracks_texture_tiling = obj.vehicle_window_properties.cracks_texture_tiling
     return window
 
 
-def fragment_from_object(exportop, fobj, exportpath, export_settings=None):
+def fragment_from_object_steps(exportop, fobj, exportpath, export_settings=None):
+    """Generator version of fragment_from_object, yields the name of each model and child as it is exported"""
     fragment = Fragment()
 
     dobj = None
@@ -90,20 +94,19 @@ def fragment_from_object(exportop, fobj, exportpath, export_settings=None):
     if dobj == None:
         raise Exception("NO DRAWABLE TO EXPORT.")
 
-    materials = None
-    materials = get_used_materials(fobj)
+    export_context = getattr(exportop, "export_context", None)
+    materials, _ = get_export_materials(
+        fobj, export_settings, export_context=export_context)
 
-    fragment.drawable = drawable_from_object(
+    fragment.drawable = yield from drawable_from_object_steps(
         exportop, dobj, exportpath, None, materials, export_settings, True)
 
     lights_from_object(fobj, fragment.lights,
                        export_settings, armature_obj=dobj)
 
     fragment.name = fobj.name.split(".")[0]
-    fragment.bounding_sphere_center = get_bound_center(
+    fragment.bounding_sphere_center, fragment.bounding_sphere_radius = get_bound_sphere(
         fobj, world=export_settings.use_transforms)
-    fragment.bounding_sphere_radius = get_sphere_radius(
-        fragment.drawable.bounding_box_max, fragment.drawable.bounding_sphere_center)
 
     fragment.unknown_b0 = fobj.fragment_properties.unk_b0
     fragment.unknown_b8 = fobj.fragment_properties.unk_b8
@@ -118,7 +121,7 @@ def fragment_from_object(exportop, fobj, exportpath, export_settings=None):
         m = Matrix()
         for model in dobj.children:
             if model.drawable_model_properties.bone_index == idx:
-                m = model.matrix_basis
+                m = model.matrix_basis.copy()
         fragment.bones_transforms.append(
             BoneTransformItem("Item", m))
 
@@ -224,8 +227,8 @@ def fragment_from_object(exportop, fobj, exportpath, export_settings=None):
             dobj = get_fragment_drawable(cobj)
 
             if dobj:
-                child.drawable = drawable_from_object(
-                    exportop, dobj, exportpath, None, materials, export_settings, True, False)
+                child.drawable = run_steps(drawable_from_object_steps(
+                    exportop, dobj, exportpath, None, materials, export_settings, True, False))
             else:
                 child.drawable.matrix = Matrix()
                 child.drawable.shader_group = None
@@ -241,9 +244,10 @@ def fragment_from_object(exportop, fobj, exportpath, export_settings=None):
             transform[3][2] = c
             flod.transforms.append(TransformItem("Item", transform))
             flod.children.append(child)
+            yield cobj.name
 
         for wobj in vwobjs:
-            vehwindow = obj_to_vehicle_window(wobj, materials)
+            vehwindow = obj_to_vehicle_window(wobj, materials, export_context)
             vehwindow.item_id = get_obj_parent_group_index(gobjs, wobj)
             fragment.vehicle_glass_windows.append(vehwindow)
 
@@ -261,9 +265,14 @@ def fragment_from_object(exportop, fobj, exportpath, export_settings=None):
     return fragment
 
 
-def export_yft(exportop, obj, filepath, export_settings):
-    fragment = fragment_from_object(exportop, obj, filepath, export_settings)
-    fragment.write_xml(filepath)
+def fragment_from_object(exportop, fobj, exportpath, export_settings=None):
+    return run_steps(fragment_from_object_steps(exportop, fobj, exportpath, export_settings))
+
+
+def export_yft_steps(exportop, obj, filepath, export_settings):
+    """Generator version of export_yft, yields the name of each model and child as it is exported"""
+    fragment = yield from fragment_from_object_steps(exportop, obj, filepath, export_settings)
+    XmlWriter.write(fragment, filepath)
 
     if export_settings.export_with_hi:
         fragment.drawable.drawable_models_med = None
@@ -275,4 +284,8 @@ def export_yft(exportop, obj, filepath, export_settings):
             child.drawable.drawable_models_vlow = None
         filepath = os.path.join(os.path.dirname(filepath),
                                 os.path.basename(filepath).replace(".yft.xml", "_hi.yft.xml"))
-        fragment.write_xml(filepath)
+        XmlWriter.write(fragment, filepath)
+
+
+def export_yft(exportop, obj, filepath, export_settings):
+    run_steps(export_yft_steps(exportop, obj, filepath, export_settings))
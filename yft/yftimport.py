@@ -5,7 +5,7 @@ from ..tools.meshhelper import create_plane, create_uv_layer
 from ..tools.drawablehelper import get_drawable_geometries, join_drawable_geometries
 from ..resources.fragment import YFT
 from ..tools.fragmenthelper import shattermap_to_image, shattermap_to_material
-from ..ydr.ydrimport import drawable_to_obj, shadergroup_to_materials, create_lights
+from ..ydr.ydrimport import drawable_to_obj, shadergroup_to_materials, create_lights, get_excluded_lod_tags, get_used_shader_indices
 from ..ybn.ybnimport import composite_to_obj
 from ..sollumz_properties import SOLLUMZ_UI_NAMES, SollumType
 
@@ -173,6 +173,20 @@ def create_lod_obj(fragment, lod, filepath, materials, import_settings):
     return lobj
 
 
+def get_fragment_shader_indices(fragment):
+    drawables = [fragment.drawable]
+    for lod in (fragment.physics.lod1, fragment.physics.lod2, fragment.physics.lod3):
+        for child in lod.children:
+            drawables.append(child.drawable)
+
+    indices = get_used_shader_indices(drawables)
+    # Vehicle windows reference their glass shader directly
+    for window in fragment.vehicle_glass_windows:
+        indices.add(window.unk_ushort_1 - 1)
+
+    return indices
+
+
 def fragment_to_obj(fragment, filepath, import_settings=None):
     fobj = bpy.data.objects.new(fragment.name, None)
     fobj.empty_display_size = 0
@@ -190,8 +204,11 @@ def fragment_to_obj(fragment, filepath, import_settings=None):
 
     materials = None
     if fragment.drawable:
+        shader_indices = None
+        if get_excluded_lod_tags(import_settings):
+            shader_indices = get_fragment_shader_indices(fragment)
         materials = shadergroup_to_materials(
-            fragment.drawable.shader_group, filepath)
+            fragment.drawable.shader_group, filepath, shader_indices)
         dobj = drawable_to_obj(
             fragment.drawable, filepath, fragment.drawable.name, None, materials, import_settings)
         dobj.matrix_basis = fragment.drawable.matrix
@@ -240,5 +257,6 @@ def get_fragment_drawable(fragment):
 
 
 def import_yft(filepath, import_settings):
-    yft_xml = YFT.from_xml_file(filepath)
+    yft_xml = YFT.from_xml_file(
+        filepath, get_excluded_lod_tags(import_settings))
     fragment_to_obj(yft_xml, filepath, import_settings)